@@ -1,6 +1,7 @@
 # main.py
 # --- Imports ---
 import datetime
+import os
 from typing import List
 
 from fastapi import FastAPI, Depends, HTTPException, status
@@ -9,14 +10,15 @@ from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.ext.declarative import declarative_base
 from pydantic import BaseModel, Field
 
-# --- Configuração do Banco de Dados (usando SQLite em arquivo) ---
-# Em uma aplicação real, considere usar variáveis de ambiente para a URL.
-SQLALCHEMY_DATABASE_URL = "sqlite:///./transactions.db"
+# --- Configuração do Banco de Dados (SQLite em arquivo por padrão) ---
+# A URL vem da variável de ambiente SQLALCHEMY_DATABASE_URL, a mesma usada pela transaction-api.
+SQLALCHEMY_DATABASE_URL = os.getenv("SQLALCHEMY_DATABASE_URL", "sqlite:///./transactions.db")
 
 # create_engine é o ponto de entrada para o banco de dados.
 # O argumento connect_args é necessário apenas para SQLite para permitir o uso em múltiplos threads.
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False} if SQLALCHEMY_DATABASE_URL.startswith("sqlite") else {}
 )
 
 # Cada instância de SessionLocal será uma sessão de banco de dados.
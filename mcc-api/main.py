@@ -1,9 +1,19 @@
+import asyncio
+import gzip
+import hashlib
 import json
-from typing import List, Optional
-from fastapi import FastAPI, HTTPException, status
+import os
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional
+from fastapi import FastAPI, HTTPException, Query, Request, Response, status
 from pydantic import BaseModel, Field, ConfigDict
 from contextlib import asynccontextmanager
 
+try:
+    import brotli
+except ImportError:  # brotli is optional; without it only gzip and identity are served
+    brotli = None
+
 
 class MccEntry(BaseModel):
     """
@@ -23,7 +33,77 @@ class MccEntry(BaseModel):
         }
     )
 
+class MccBatchRequest(BaseModel):
+    """
+    Codes to resolve in a single batch lookup.
+    """
+    codes: List[int] = Field(..., description="Merchant Category Codes to look up")
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "examples": [
+                {
+                    "codes": [5812, 5411, 9999]
+                }
+            ]
+        }
+    )
+
+
+class MccBatchResponse(BaseModel):
+    """
+    Result of a batch lookup: the entries found and the codes that do not exist.
+    """
+    found: List[MccEntry] = Field(..., description="Entries found, in request order")
+    missing: List[int] = Field(..., description="Requested codes that were not found")
+
+
+class MccIndex:
+    """
+    Lookup structures built once from the loaded MCC entries:
+    a code -> entry hash index for point lookups, a sorted code list for range queries
+    and the `GET /mcc` body, pre-serialized (and pre-compressed) with its ETags.
+    """
+
+    def __init__(self, entries: List[MccEntry]):
+        self.entries = entries
+        self.by_code: Dict[int, MccEntry] = {entry.code: entry for entry in entries}
+        self.sorted_entries = sorted(self.by_code.values(), key=lambda entry: entry.code)
+        self.sorted_codes = [entry.code for entry in self.sorted_entries]
+
+        # Same bytes FastAPI's JSONResponse would render for List[MccEntry]
+        body = json.dumps(
+            [entry.model_dump(mode="json") for entry in entries],
+            ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+        ).encode("utf-8")
+        self.payloads: Dict[str, bytes] = {"identity": body, "gzip": gzip.compress(body, mtime=0)}
+        if brotli is not None:
+            self.payloads["br"] = brotli.compress(body)
+
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        # Strong ETags must differ per content-coding
+        self.etags: Dict[str, str] = {
+            encoding: f'"{digest}"' if encoding == "identity" else f'"{digest}-{encoding}"'
+            for encoding in self.payloads
+        }
+
+    def __len__(self) -> int:
+        return len(self.by_code)
+
+    def get(self, code: int) -> Optional[MccEntry]:
+        return self.by_code.get(code)
+
+    def range(self, start: int, end: int) -> List[MccEntry]:
+        """Returns the entries with start <= code <= end, ordered by code."""
+        return self.sorted_entries[bisect_left(self.sorted_codes, start):bisect_right(self.sorted_codes, end)]
+
+
+# Path of the MCC data file and how often (seconds) it is checked for changes; 0 disables hot reload
+MCC_DATA_FILE = os.getenv("MCC_DATA_FILE", "mcc.json")
+MCC_RELOAD_INTERVAL = float(os.getenv("MCC_RELOAD_INTERVAL", "2"))
+
 mcc_data: Optional[List[MccEntry]] = None
+mcc_index: Optional[MccIndex] = None
 
 def load_mcc_data(file_path: str = "mcc.json") -> List[MccEntry]:
     """
@@ -66,13 +146,58 @@ def load_mcc_data(file_path: str = "mcc.json") -> List[MccEntry]:
             detail=f"An unexpected error occurred while loading MCC data: {e}"
         )
 
+def get_file_signature(file_path: str) -> Optional[tuple]:
+    """Returns (mtime, size) of the file, or None if it does not exist."""
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+async def watch_mcc_file(file_path: str, interval: float):
+    """
+    Polls the MCC data file and reloads it when its mtime or size changes.
+
+    The new file is parsed and indexed off the event loop, then swapped in with a single
+    assignment of `mcc_index`, so requests see either the old or the new data, never a
+    half-loaded one. If the new file is invalid, the current data is kept.
+    """
+    global mcc_data, mcc_index
+    signature = get_file_signature(file_path)
+    while True:
+        await asyncio.sleep(interval)
+        current = get_file_signature(file_path)
+        if current is None or current == signature:
+            continue
+        signature = current
+        try:
+            entries = await asyncio.to_thread(load_mcc_data, file_path)
+            new_index = await asyncio.to_thread(MccIndex, entries)
+        except HTTPException as exc:
+            print(f"Reload of {file_path} failed, keeping the current MCC data: {exc.detail}")
+            continue
+        mcc_index = new_index
+        mcc_data = entries
+        print(f"Reloaded {len(entries)} MCC entries from {file_path}")
+
+
 @asynccontextmanager
 async def lifespan(app):
-    global mcc_data
-    mcc_data = load_mcc_data()
-    print(f"Loaded {len(mcc_data)} MCC entries from mcc.json")
+    global mcc_data, mcc_index
+    mcc_data = load_mcc_data(MCC_DATA_FILE)
+    mcc_index = MccIndex(mcc_data)
+    print(f"Loaded {len(mcc_data)} MCC entries from {MCC_DATA_FILE}")
+
+    watcher = None
+    if MCC_RELOAD_INTERVAL > 0:
+        watcher = asyncio.create_task(watch_mcc_file(MCC_DATA_FILE, MCC_RELOAD_INTERVAL))
+
     yield  # Aqui o app está pronto para servir requisições
 
+    if watcher:
+        watcher.cancel()
+
 app = FastAPI(
     title="MCC Lookup API",
     description="A simple API to retrieve Merchant Category Codes from a JSON file.",
@@ -80,18 +205,93 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+def get_loaded_index() -> MccIndex:
+    """Returns the MCC index built at startup, or fails if the data could not be loaded."""
+    if mcc_index is None:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="MCC data not loaded. Please check application logs for errors."
+        )
+    return mcc_index
+
+
+def negotiate_encoding(accept_encoding: str, available) -> str:
+    """Picks the preferred content-coding accepted by the client: br, then gzip, then identity."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    for encoding in ("br", "gzip"):
+        if encoding in available and accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return "identity"
+
+
+def etag_matches(if_none_match: Optional[str], etags) -> bool:
+    """Weak comparison of If-None-Match against the ETags of any representation."""
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or not candidates.isdisjoint(etags)
+
+
 @app.get("/mcc", response_model=List[MccEntry], tags=["MCC"])
-def get_all_mcc_codes():
+def get_all_mcc_codes(request: Request):
     """
     Retrieves all Merchant Category Codes and their descriptions.
+
+    The body is serialized once at load time and served with a strong `ETag`;
+    send it back in `If-None-Match` to get a `304 Not Modified`.
     """
-    # Check if data was loaded successfully during startup
-    if mcc_data is None:
+    index = get_loaded_index()
+    encoding = negotiate_encoding(request.headers.get("accept-encoding", ""), index.payloads)
+    headers = {"ETag": index.etags[encoding], "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+
+    if etag_matches(request.headers.get("if-none-match"), index.etags.values()):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=index.payloads[encoding], media_type="application/json", headers=headers)
+
+
+@app.post("/mcc/batch", response_model=MccBatchResponse, tags=["MCC"])
+def get_mcc_batch(request: MccBatchRequest):
+    """
+    Resolves many Merchant Category Codes in one request.
+    Duplicated codes are resolved once; unknown codes are listed in `missing`.
+    """
+    index = get_loaded_index()
+    found, missing = [], []
+    for code in dict.fromkeys(request.codes):
+        entry = index.get(code)
+        if entry:
+            found.append(entry)
+        else:
+            missing.append(code)
+    return MccBatchResponse(found=found, missing=missing)
+
+
+@app.get("/mcc/range", response_model=List[MccEntry], tags=["MCC"])
+def get_mcc_range(
+    start: int = Query(..., description="First code of the range (inclusive)"),
+    end: int = Query(..., description="Last code of the range (inclusive)")
+):
+    """
+    Retrieves every MCC between `start` and `end`, e.g. 3000-3299 for airlines.
+    """
+    if start > end:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="MCC data not loaded. Please check application logs for errors."
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'start' must be less than or equal to 'end'."
         )
-    return mcc_data
+    return get_loaded_index().range(start, end)
 
 
 @app.get("/mcc/{code}", response_model=MccEntry, tags=["MCC"])
@@ -100,13 +300,7 @@ def get_mcc_by_code(code: int):
     Retrieves the description for a specific Merchant Category Code (MCC).
     - **code**: The 4-digit MCC to look up.
     """
-    if mcc_data is None:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="MCC data not loaded. Please check application logs for errors."
-        )
-
-    found_mcc = next((mcc for mcc in mcc_data if mcc.code == code), None)
+    found_mcc = get_loaded_index().get(code)
 
     if found_mcc:
         return found_mcc
@@ -115,4 +309,3 @@ def get_mcc_by_code(code: int):
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"MCC '{code}' not found."
         )
-
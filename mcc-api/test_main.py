@@ -1,3 +1,5 @@
+import json
+import time
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import patch
@@ -54,4 +56,70 @@ def test_get_mcc_by_code_not_found(mock_load, client, fake_mcc_data):
         
         response = client.get(f"/mcc/{code}")
         assert response.status_code == 404
-        assert "not found" in response.json()["detail"].lower()
\ No newline at end of file
+        assert "not found" in response.json()["detail"].lower()
+
+@patch("main.load_mcc_data")
+def test_get_mcc_range(mock_load, client):
+    mock_load.return_value = [MccEntry(code=code, description=f"MCC {code}") for code in (3300, 3000, 3299, 5812)]
+    with client:
+        response = client.get("/mcc/range", params={"start": 3000, "end": 3299})
+        assert response.status_code == 200
+        assert [entry["code"] for entry in response.json()] == [3000, 3299]
+
+        response = client.get("/mcc/range", params={"start": 3299, "end": 3000})
+        assert response.status_code == 400
+
+
+@patch("main.load_mcc_data")
+def test_get_mcc_batch(mock_load, client, fake_mcc_data):
+    mock_load.return_value = [MccEntry(**item) for item in fake_mcc_data]
+    codes = [fake_mcc_data[1]["code"], 999999, fake_mcc_data[0]["code"], fake_mcc_data[1]["code"]]
+    with client:
+        response = client.post("/mcc/batch", json={"codes": codes})
+        assert response.status_code == 200
+        data = response.json()
+        assert [entry["code"] for entry in data["found"]] == [fake_mcc_data[1]["code"], fake_mcc_data[0]["code"]]
+        assert data["missing"] == [999999]
+
+
+@patch("main.load_mcc_data")
+def test_get_all_mcc_codes_etag_and_compression(mock_load, client, fake_mcc_data):
+    mock_load.return_value = [MccEntry(**item) for item in fake_mcc_data]
+    with client:
+        response = client.get("/mcc", headers={"Accept-Encoding": "identity"})
+        assert response.status_code == 200
+        assert response.json() == fake_mcc_data
+        assert "content-encoding" not in response.headers
+        etag = response.headers["etag"]
+
+        compressed = client.get("/mcc", headers={"Accept-Encoding": "gzip"})
+        assert compressed.headers["content-encoding"] == "gzip"
+        assert compressed.json() == fake_mcc_data
+
+        not_modified = client.get("/mcc", headers={"If-None-Match": etag})
+        assert not_modified.status_code == 304
+        assert not_modified.content == b""
+
+
+def test_mcc_file_hot_reload(client, tmp_path, monkeypatch):
+    mcc_file = tmp_path / "mcc.json"
+    mcc_file.write_text(json.dumps([{"code": 1111, "description": "Original"}]), encoding="utf-8")
+    monkeypatch.setattr("main.MCC_DATA_FILE", str(mcc_file))
+    monkeypatch.setattr("main.MCC_RELOAD_INTERVAL", 0.05)
+
+    with client:
+        assert client.get("/mcc/1111").json()["description"] == "Original"
+
+        mcc_file.write_text(json.dumps([{"code": 2222, "description": "Nova"}]), encoding="utf-8")
+        for _ in range(40):
+            if client.get("/mcc/2222").status_code == 200:
+                break
+            time.sleep(0.05)
+
+        assert client.get("/mcc/2222").json()["description"] == "Nova"
+        assert client.get("/mcc/1111").status_code == 404
+
+        # Um arquivo inválido não derruba os dados atuais
+        mcc_file.write_text("{ invalido", encoding="utf-8")
+        time.sleep(0.2)
+        assert client.get("/mcc/2222").status_code == 200
@@ -1,22 +1,19 @@
 from flask import Flask, jsonify, request
+import atexit
 import json
 import logging
 import sys
+import threading
 from flask.logging import default_handler
 import os
 from dotenv import load_dotenv
 from gevent.pywsgi import WSGIServer
+from store import IdConflict, JsonStore
 
 def removeLog():
     logging.getLogger('werkzeug').setLevel(logging.ERROR)
     sys.modules['flask.cli'].show_server_banner = lambda *x: None
 
-def findIndexById(resourceList, id):
-    for index, item in enumerate(resourceList):
-        if item.get("id") == id:
-            return index
-    return None
-
 def printColor(message, color):
     return (f"\033[{color}m{message}\033[00m")
 
@@ -25,100 +22,159 @@ load_dotenv()
 app = Flask(__name__)
 
 
-print(f"Running JSON-SERVER on port {os.getenv('PORT')}")
+# Dataset file, kept in memory by the store; writes go to an append-only log next to it
+DB_PATH = os.getenv('DB_PATH', 'db.json')
 
-def load_data():
-    try:
-        with open('db.json', 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {}
+# Built on first use (see get_store), so importing this module never opens or rewrites DB_PATH
+store = None
+_store_lock = threading.Lock()
 
-def save_data(data):
-    with open('db.json', 'w') as f:
-        json.dump(data, f, indent=4)
 
-try:
-    with open('db.json', 'r') as f:
-        data = json.load(f)
+def get_store():
+    """Returns the JsonStore for DB_PATH, opening it on first use and closing it at exit."""
+    global store
+    with _store_lock:
+        if store is None:
+            store = JsonStore(
+                DB_PATH,
+                compact_every=int(os.getenv('COMPACT_EVERY', '1000')),
+                indexed_fields=os.getenv('INDEXED_FIELDS', 'code,name').split(','),
+            )
+            atexit.register(store.close)
+        return store
 
-    for key in data:
-        print(f"\n\033[1m\033[4m{key.upper()}\033[00m")
-        # GET with blue
-        print(f"{printColor('GET', '34')} http://localhost:{os.getenv('PORT')}/{key}")
-        # POST with green
-        print(f"{printColor('GET', '34')} /{key}/<id>")
-        print(f"{printColor('POST', '32')} /{key}")
-        # PUT with yellow
-        print(f"{printColor('PUT', '33')} /{key}")
-        # print delete with red
-        print(f"{printColor('DELETE', '31')} /{key}")
 
-except FileNotFoundError:
-    print("json data not found")
-    exit()
+def print_routes():
+    print(f"Running JSON-SERVER on port {os.getenv('PORT')}")
+    try:
+        with open(DB_PATH, 'r') as f:
+            data = json.load(f)
+
+        for key in data:
+            print(f"\n\033[1m\033[4m{key.upper()}\033[00m")
+            # GET with blue
+            print(f"{printColor('GET', '34')} http://localhost:{os.getenv('PORT')}/{key}")
+            # POST with green
+            print(f"{printColor('GET', '34')} /{key}/<id>")
+            print(f"{printColor('POST', '32')} /{key}")
+            print(f"{printColor('POST', '32')} /{key}/_bulk")
+            # PUT with yellow
+            print(f"{printColor('PUT', '33')} /{key}")
+            # print delete with red
+            print(f"{printColor('DELETE', '31')} /{key}")
+
+    except FileNotFoundError:
+        print("json data not found")
+        exit()
 
 
 @app.route('/<resource>', methods=['GET'])
 def get_resource(resource):
-    data = load_data()
-    if resource in data:
-        return jsonify(data[resource])
-    else:
+    if not request.args:
+        items = get_store().get_collection(resource)
+        if items is not None:
+            return jsonify(items)
+        else:
+            return jsonify({"error": "Resource not found"}), 404
+
+    # json-server style query: ?field=value&_sort=field&_order=desc&_page=1&_limit=10&_fields=id,code
+    filters = {key: request.args.getlist(key) for key in request.args if not key.startswith('_')}
+    page = request.args.get('_page', type=int)
+    limit = request.args.get('_limit', type=int)
+    invalid_page = '_page' in request.args and (page is None or page < 1)
+    invalid_limit = '_limit' in request.args and (limit is None or limit < 1)
+    if invalid_page or invalid_limit:
+        return jsonify({"error": "_page and _limit must be positive integers"}), 400
+    fields = request.args.get('_fields')
+
+    items, total = get_store().query(
+        resource,
+        filters=filters,
+        sort=request.args.get('_sort'),
+        order=request.args.get('_order', 'asc').lower(),
+        page=page,
+        limit=limit,
+        fields=fields.split(',') if fields else None,
+    )
+    if items is None:
         return jsonify({"error": "Resource not found"}), 404
+    response = jsonify(items)
+    response.headers['X-Total-Count'] = str(total)
+    return response
 
 @app.route('/<resource>/<id>', methods=['GET'])
 def get_resource_by_id_with_children(resource, id):
-    data = load_data()
-    if resource in data:
-        for item in data[resource]:
-            if str(item.get('id')) == str(id):
-                return jsonify(item)
-        return jsonify({"error": f"{resource} not found"}), 404
+    item = get_store().get_item(resource, id)
+    if item is not None:
+        return jsonify(item)
     else:
         return jsonify({"error": f"{resource} not found"}), 404
 
 
 @app.route('/<resource>', methods=['POST'])
 def create_resource(resource):
-    data = load_data()
-    if resource not in data:
-        data[resource] = []
-    data[resource].append(request.json)
-    save_data(data)
-    return jsonify(data[resource]), 201
+    if not isinstance(request.json, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+    try:
+        get_store().create(resource, request.json)
+    except IdConflict as exc:
+        return jsonify({"error": f"{resource} with id {exc.ids[0]} already exists"}), 409
+    return jsonify(get_store().get_collection(resource)), 201
+
+@app.route('/<resource>/_bulk', methods=['POST'])
+def bulk_create_resource(resource):
+    items = request.json
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        return jsonify({"error": "Request body must be a JSON array of objects"}), 400
+    try:
+        created = get_store().create_many(resource, items)
+    except IdConflict as exc:
+        return jsonify({"error": f"{resource} ids already exist or are repeated", "ids": exc.ids}), 409
+    if request.args.get('_return') == 'ids':
+        return jsonify({"ids": [item["id"] for item in created]}), 201
+    return jsonify(created), 201
+
+@app.route('/<resource>/_bulk', methods=['PATCH'])
+def bulk_patch_resource(resource):
+    changes = request.json
+    if not isinstance(changes, list) or not all(isinstance(change, dict) and "id" in change for change in changes):
+        return jsonify({"error": "Request body must be a JSON array of objects with an id"}), 400
+    patched, missing = get_store().patch_many(resource, changes)
+    if request.args.get('_return') == 'ids':
+        return jsonify({"ids": [item["id"] for item in patched], "missing": missing})
+    return jsonify({"updated": patched, "missing": missing})
 
 @app.route('/<resource>/<id>', methods=['PUT'])
 def update_resource(resource, id):
-    data = load_data()
-    needle = findIndexById(data.get(resource, []), int(id))
-    if needle is not None:
-        data[resource][needle] = request.json
-        save_data(data)
-        return jsonify(data[resource][needle])
+    if not isinstance(request.json, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+    try:
+        item = get_store().update(resource, id, request.json)
+    except IdConflict as exc:
+        return jsonify({"error": f"{resource} with id {exc.ids[0]} already exists"}), 409
+    if item is not None:
+        return jsonify(item)
     else:
         return jsonify({"error": f"{resource} not found"}), 404
 
 
 @app.route('/<resource>/<id>', methods=['PATCH'])
 def patch_resource(resource, id):
-    data = load_data()
-    needle = findIndexById(data.get(resource, []), int(id))
-    if needle is not None:
-        data[resource][needle].update(request.json)
-        save_data(data)
-        return jsonify(data[resource][needle])
+    if not isinstance(request.json, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+    try:
+        item = get_store().patch(resource, id, request.json)
+    except IdConflict as exc:
+        return jsonify({"error": f"{resource} with id {exc.ids[0]} already exists"}), 409
+    if item is not None:
+        return jsonify(item)
     else:
         return jsonify({"error": f"{resource} not found"}), 404
 
 
 @app.route('/<resource>/<id>', methods=['DELETE'])
 def delete_resource(resource, id):
-    data = load_data()
-    needle = findIndexById(data.get(resource, []), int(id))
-    if needle is not None:
-        data[resource].pop(needle)
-        save_data(data)
+    if get_store().delete(resource, id):
         return jsonify({"message": f"{resource} deleted"})
     else:
         return jsonify({"error": f"{resource} not found"}), 404
@@ -129,5 +185,7 @@ def delete_resource(resource, id):
 if __name__ == "__main__":
     # use .env file to get port
     # app.run(port=os.getenv('PORT'), debug=False)
+    print_routes()
+    get_store()
     http_server = WSGIServer(('', int(os.getenv('PORT'))), app)
     http_server.serve_forever()
\ No newline at end of file
@@ -0,0 +1,446 @@
+import json
+import os
+import threading
+
+
+class IdConflict(Exception):
+    """A write would give an item an id that another item of the resource already has."""
+
+    def __init__(self, ids):
+        self.ids = list(ids)
+        super().__init__(f"id already exists: {', '.join(map(str, self.ids))}")
+
+
+class JsonStore:
+    """
+    In-memory copy of db.json with write-behind persistence.
+
+    Reads never touch the disk. Every mutation is appended as one JSON line to
+    `<path>.log` and applied in memory, so a write costs O(record) instead of rewriting
+    the whole file. Once the log holds `compact_every` entries, a background thread
+    writes a fresh snapshot of db.json and starts a new log.
+
+    Each resource keeps an index from id to list position, maintained on every write, so
+    lookups and mutations by id are O(1). Deleted items leave a tombstone (None) that is
+    swept once tombstones make up half of the list. Fields listed in `indexed_fields` also
+    get a value -> positions index used by equality filters in `query`.
+
+    Items are never mutated in place (updates replace the dict), so readers can take a
+    shallow copy of a collection without holding the lock.
+    """
+
+    def __init__(self, path='db.json', compact_every=1000, fsync=False, indexed_fields=("code", "name")):
+        self.path = path
+        self.log_path = f"{path}.log"
+        self.rotated_log_path = f"{path}.log.old"
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.indexed_fields = tuple(indexed_fields)
+        self._lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+        self._log = None
+        self._log_entries = 0
+        self._compacting = False
+        self._index = {}
+        self._field_index = {}
+        self._max_id = {}
+        self._tombstones = {}
+        self.data = {}
+        self._load()
+        if self._log_entries:
+            # Start every run from a clean snapshot, so a rotated log never has to be merged
+            self.compact()
+
+    # --- Loading and log replay ---
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                self.data = json.load(f)
+        except FileNotFoundError:
+            self.data = {}
+        for resource in self.data:
+            self._reindex(resource)
+        for log_path in (self.rotated_log_path, self.log_path):
+            self._log_entries += self._replay(log_path)
+
+    def _replay(self, log_path):
+        """
+        Applies a log on top of the loaded data. Operations are idempotent (creates are
+        upserts by id), so replaying entries already contained in the snapshot is harmless.
+        Only replay relies on the upsert: the write methods reject ids that are already taken.
+        """
+        replayed = 0
+        try:
+            with open(log_path, 'r') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn write left by a crash
+                    self._apply(entry)
+                    replayed += 1
+        except FileNotFoundError:
+            pass
+        return replayed
+
+    @staticmethod
+    def _id_of(item):
+        return item.get("id") if isinstance(item, dict) else None
+
+    @staticmethod
+    def _id_key(id):
+        """
+        Index key of an id: numeric strings are keyed as ints, so /regions/01 finds id 1 and
+        an id written as "5" and one written as 5 are the same id. Ids are stored as given.
+        """
+        if isinstance(id, str):
+            try:
+                return int(id)
+            except ValueError:
+                return id
+        return id if isinstance(id, int) else str(id)
+
+    @staticmethod
+    def _as_query_value(value):
+        """Renders a value the way it is written in a query string (e.g. true, 1.5, CA)."""
+        return value if isinstance(value, str) else json.dumps(value)
+
+    def _index_fields(self, resource, item, position, add=True):
+        if not isinstance(item, dict):
+            return
+        for field in self.indexed_fields:
+            if field not in item:
+                continue
+            positions = self._field_index[resource][field].setdefault(self._as_query_value(item[field]), set())
+            if add:
+                positions.add(position)
+            else:
+                positions.discard(position)
+
+    def _track_id(self, resource, id):
+        key = self._id_key(id)
+        if isinstance(key, int) and key > self._max_id.get(resource, 0):
+            self._max_id[resource] = key
+
+    def _reindex(self, resource):
+        """Rebuilds the id index of a resource, sweeping its tombstones."""
+        items = [item for item in self.data[resource] if item is not None]
+        index = {}
+        for position, item in enumerate(items):
+            id = self._id_of(item)
+            if id is not None:
+                index[self._id_key(id)] = position
+                self._track_id(resource, id)
+        self.data[resource] = items
+        self._index[resource] = index
+        self._tombstones[resource] = 0
+        self._field_index[resource] = {field: {} for field in self.indexed_fields}
+        for position, item in enumerate(items):
+            self._index_fields(resource, item, position)
+
+    def _position(self, resource, id):
+        if id is None:
+            return None
+        return self._index.get(resource, {}).get(self._id_key(id))
+
+    def _apply(self, entry):
+        resource = entry["resource"]
+        if resource not in self.data:
+            self.data[resource] = []
+            self._reindex(resource)
+        items = self.data[resource]
+        index = self._index[resource]
+
+        if entry["op"] == "delete":
+            position = self._position(resource, entry["id"])
+            if position is not None:
+                self._index_fields(resource, items[position], position, add=False)
+                items[position] = None
+                del index[self._id_key(entry["id"])]
+                self._tombstones[resource] += 1
+                if self._tombstones[resource] * 2 > len(items):
+                    self._reindex(resource)
+            return
+
+        item = entry["item"]
+        new_id = self._id_of(item)
+        position = None
+        if entry["op"] != "create":
+            position = self._position(resource, entry["id"])
+        if position is None:
+            position = self._position(resource, new_id)
+        if position is None:
+            items.append(item)
+            position = len(items) - 1
+        else:
+            old_id = self._id_of(items[position])
+            self._index_fields(resource, items[position], position, add=False)
+            items[position] = item
+            old_key = None if old_id is None else self._id_key(old_id)
+            if old_key is not None and old_key != self._id_key(new_id) and index.get(old_key) == position:
+                del index[old_key]
+        if new_id is not None:
+            index[self._id_key(new_id)] = position
+            self._track_id(resource, new_id)
+        self._index_fields(resource, item, position)
+
+    # --- Reads ---
+
+    def resources(self):
+        return list(self.data)
+
+    def snapshot(self):
+        """Returns a copy of the whole dataset without tombstones."""
+        return {resource: self.get_collection(resource) for resource in self.resources()}
+
+    def get_collection(self, resource):
+        items = self.data.get(resource)
+        return None if items is None else [item for item in list(items) if item is not None]
+
+    def get_item(self, resource, id):
+        # Lock-free fast path; a concurrent sweep may move positions, so the hit is verified
+        position = self._position(resource, id)
+        items = self.data.get(resource, [])
+        if position is not None and position < len(items):
+            item = items[position]
+            if item is not None and self._id_key(self._id_of(item)) == self._id_key(id):
+                return item
+        with self._lock:
+            position = self._position(resource, id)
+            return None if position is None else self.data[resource][position]
+
+    def query(self, resource, filters=None, sort=None, order="asc", page=None, limit=None, fields=None):
+        """
+        json-server style query over a collection. Returns (items, total) where `total` is
+        the number of matches before pagination, or None if the resource does not exist.
+
+        - filters: {field: [values]}; values of one field are OR-ed, fields are AND-ed.
+          Indexed fields are resolved through their value index, the others by a scan.
+        - sort/order: sort by a field, "asc" or "desc"; items without the field go last.
+        - page/limit: 1-based page of `limit` items (10 by default when only page is given);
+          values below 1 raise ValueError.
+        - fields: keep only these keys in each item.
+        """
+        filters = filters or {}
+        with self._lock:
+            items = self.data.get(resource)
+            if items is None:
+                return None, 0
+            indexed = [field for field in filters if field in self._field_index[resource]]
+            if indexed:
+                positions = None
+                for field in indexed:
+                    matches = set()
+                    for value in filters[field]:
+                        matches |= self._field_index[resource][field].get(value, set())
+                    positions = matches if positions is None else positions & matches
+                matched = [items[position] for position in sorted(positions)]
+            else:
+                matched = list(items)
+
+        scanned = {field: set(values) for field, values in filters.items() if field not in indexed}
+        matched = [
+            item for item in matched
+            if item is not None and all(
+                isinstance(item, dict) and field in item and self._as_query_value(item[field]) in values
+                for field, values in scanned.items()
+            )
+        ]
+
+        if sort:
+            present = [item for item in matched if isinstance(item, dict) and item.get(sort) is not None]
+            missing = [item for item in matched if not (isinstance(item, dict) and item.get(sort) is not None)]
+            try:
+                present.sort(key=lambda item: item[sort], reverse=order == "desc")
+            except TypeError:
+                present.sort(key=lambda item: self._as_query_value(item[sort]), reverse=order == "desc")
+            matched = present + missing
+
+        total = len(matched)
+        if page is not None or limit is not None:
+            limit = limit if limit is not None else 10
+            if limit < 1 or (page is not None and page < 1):
+                raise ValueError("page and limit must be positive")
+            start = ((page or 1) - 1) * limit
+            matched = matched[start:start + limit]
+
+        if fields:
+            matched = [{field: item[field] for field in fields if field in item} for item in matched]
+        return matched, total
+
+    # --- Writes ---
+
+    @staticmethod
+    def _open_for_append(path):
+        """Opens a log for appending, terminating a torn last line left by a crash."""
+        f = open(path, 'a+')
+        if f.tell() > 0:
+            f.seek(f.tell() - 1)
+            if f.read(1) != "\n":
+                f.write("\n")
+        return f
+
+    def _write_log(self, entries):
+        if self._log is None:
+            self._log = self._open_for_append(self.log_path)
+        self._log.write("".join(json.dumps(entry) + "\n" for entry in entries))
+        self._log.flush()
+        if self.fsync:
+            os.fsync(self._log.fileno())
+        self._log_entries += len(entries)
+
+    def _commit(self, *entries):
+        """Logs the entries in one write, applies them in memory and schedules a compaction when due."""
+        if not entries:
+            return
+        self._write_log(entries)
+        for entry in entries:
+            self._apply(entry)
+        if self._log_entries >= self.compact_every and not self._compacting:
+            self._compacting = True
+            threading.Thread(target=self.compact, daemon=True).start()
+
+    def _next_id(self, resource, start=None, taken=()):
+        """The first numeric id from `start` (max id + 1 by default) that no item has and is not in `taken`."""
+        next_id = self._max_id.get(resource, 0) + 1 if start is None else start
+        while next_id in taken or self._position(resource, next_id) is not None:
+            next_id += 1
+        return next_id
+
+    def create(self, resource, item):
+        """Appends the item, with the next id when it has none. Raises IdConflict if its id is taken."""
+        with self._lock:
+            if "id" not in item:
+                item = {**item, "id": self._next_id(resource)}
+            elif self._position(resource, item["id"]) is not None:
+                raise IdConflict([item["id"]])
+            self._commit({"op": "create", "resource": resource, "item": item})
+            return item
+
+    def create_many(self, resource, items):
+        """
+        Creates all items with a single log write; returns them with their ids. The batch is
+        all or nothing: if any explicit id is already taken or repeated within the batch,
+        IdConflict is raised with those ids and nothing is written.
+        """
+        with self._lock:
+            seen, conflicts = set(), []
+            for item in items:
+                if "id" not in item:
+                    continue
+                key = self._id_key(item["id"])
+                if key in seen or self._position(resource, key) is not None:
+                    conflicts.append(item["id"])
+                seen.add(key)
+            if conflicts:
+                raise IdConflict(conflicts)
+
+            created = []
+            next_id = self._next_id(resource, taken=seen)
+            for item in items:
+                if "id" not in item:
+                    item = {**item, "id": self._next_id(resource, next_id, seen)}
+                key = self._id_key(item["id"])
+                if isinstance(key, int):
+                    next_id = max(next_id, key + 1)
+                created.append(item)
+            self._commit(*({"op": "create", "resource": resource, "item": item} for item in created))
+            return created
+
+    def _check_id_change(self, resource, current, item):
+        new_id = item.get("id")
+        if self._id_key(new_id) != self._id_key(current.get("id")) and self._position(resource, new_id) is not None:
+            raise IdConflict([new_id])
+
+    def update(self, resource, id, item):
+        """Replaces the item; None if it does not exist, IdConflict if it would take another item's id."""
+        with self._lock:
+            current = self.get_item(resource, id)
+            if current is None:
+                return None
+            if "id" not in item:
+                item = {**item, "id": current.get("id")}
+            self._check_id_change(resource, current, item)
+            self._commit({"op": "update", "resource": resource, "id": id, "item": item})
+            return item
+
+    def patch(self, resource, id, changes):
+        with self._lock:
+            current = self.get_item(resource, id)
+            if current is None:
+                return None
+            item = {**current, **changes}
+            self._check_id_change(resource, current, item)
+            self._commit({"op": "patch", "resource": resource, "id": id, "item": item})
+            return item
+
+    def patch_many(self, resource, changes):
+        """
+        Applies a list of partial updates (each one carrying its "id") with a single log
+        write. Returns (patched items, ids that were not found).
+        """
+        with self._lock:
+            patched, missing, entries = [], [], []
+            pending = {}
+            for change in changes:
+                id = change["id"]
+                current = pending.get(self._id_key(id)) or self.get_item(resource, id)
+                if current is None:
+                    missing.append(id)
+                    continue
+                item = {**current, **change, "id": current.get("id")}
+                pending[self._id_key(id)] = item
+                patched.append(item)
+                entries.append({"op": "patch", "resource": resource, "id": id, "item": item})
+            self._commit(*entries)
+            return patched, missing
+
+    def delete(self, resource, id):
+        with self._lock:
+            if self.get_item(resource, id) is None:
+                return False
+            self._commit({"op": "delete", "resource": resource, "id": id})
+            return True
+
+    # --- Persistence ---
+
+    def compact(self):
+        """
+        Writes a fresh db.json snapshot and drops the log entries it contains.
+        The lock is held only to serialize the data and rotate the log; the disk writes
+        happen outside of it, so writers are not blocked by the snapshot I/O.
+        """
+        with self._compact_lock:
+            with self._lock:
+                snapshot = json.dumps(self.snapshot(), indent=4)
+                if self._log is not None:
+                    self._log.close()
+                    self._log = None
+                if os.path.exists(self.rotated_log_path):
+                    # Left by an interrupted compaction: merge instead of overwriting it
+                    if os.path.exists(self.log_path):
+                        with self._open_for_append(self.rotated_log_path) as rotated, open(self.log_path, 'r') as log:
+                            rotated.write(log.read())
+                        os.remove(self.log_path)
+                elif os.path.exists(self.log_path):
+                    os.replace(self.log_path, self.rotated_log_path)
+                self._log_entries = 0
+            try:
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, 'w') as f:
+                    f.write(snapshot)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+                if os.path.exists(self.rotated_log_path):
+                    os.remove(self.rotated_log_path)
+            finally:
+                self._compacting = False
+
+    def close(self):
+        """Compacts pending log entries; meant to run on a clean shutdown."""
+        if self._log_entries:
+            self.compact()
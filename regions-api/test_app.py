@@ -2,6 +2,7 @@ import os
 import json
 import pytest
 from app import app
+from store import JsonStore
 
 @pytest.fixture
 def client(tmp_path, monkeypatch):
@@ -13,13 +14,8 @@ def client(tmp_path, monkeypatch):
     }
     db_path.write_text(json.dumps(db_content))
     monkeypatch.setenv("PORT", "5001")
-    # Monkeypatch open para usar o db.json fake
-    orig_open = open
-    def fake_open(file, mode='r', *args, **kwargs):
-        if file == "db.json":
-            return orig_open(db_path, mode, *args, **kwargs)
-        return orig_open(file, mode, *args, **kwargs)
-    monkeypatch.setattr("builtins.open", fake_open)
+    # Usa um store em memória apontando para o db.json fake
+    monkeypatch.setattr("app.store", JsonStore(str(db_path)))
     app.config["TESTING"] = True
     with app.test_client() as client:
         yield client
@@ -44,18 +40,118 @@ def test_post_resource(client):
     assert resp.status_code == 201
     assert any(item["id"] == 2 for item in resp.get_json())
 
+def test_post_resource_with_existing_id(client):
+    resp = client.post("/mcc", json={"id": 1, "name": "Outra"})
+    assert resp.status_code == 409
+    assert client.get("/mcc/1").get_json()["name"] == "Loja"
+
 def test_put_resource(client):
     resp = client.put("/mcc/1", json={"id": 1, "name": "Loja Atualizada"})
     assert resp.status_code == 200
     assert resp.get_json()["name"] == "Loja Atualizada"
 
+def test_put_resource_with_taken_id(client):
+    client.post("/mcc", json={"name": "Padaria"})
+    resp = client.put("/mcc/2", json={"id": 1, "name": "Padaria"})
+    assert resp.status_code == 409
+    assert client.get("/mcc/2").get_json()["name"] == "Padaria"
+
 def test_patch_resource(client):
     resp = client.patch("/mcc/1", json={"name": "Loja Patch"})
     assert resp.status_code == 200
     assert resp.get_json()["name"] == "Loja Patch"
 
+def test_get_resource_by_id_with_leading_zero(client):
+    resp = client.get("/mcc/01")
+    assert resp.status_code == 200
+    assert resp.get_json()["id"] == 1
+
+def test_put_and_patch_require_an_object(client):
+    for method in (client.put, client.patch):
+        for body in ([{"name": "Lista"}], None):
+            resp = method("/mcc/1", data=json.dumps(body), content_type="application/json")
+            assert resp.status_code == 400
+    assert client.get("/mcc/1").get_json()["name"] == "Loja"
+
 def test_delete_resource(client):
     resp = client.delete("/mcc/1")
     assert resp.status_code == 200
     assert resp.get_json()["message"] == "mcc deleted"
 
+
+def test_post_resource_assigns_id(client):
+    resp = client.post("/mcc", json={"name": "Sem id"})
+    assert resp.status_code == 201
+    assert resp.get_json()[-1] == {"id": 2, "name": "Sem id"}
+
+def test_writes_are_visible_without_reloading(client):
+    client.patch("/mcc/1", json={"name": "Loja Patch"})
+    assert client.get("/mcc/1").get_json()["name"] == "Loja Patch"
+    client.delete("/mcc/1")
+    assert client.get("/mcc/1").status_code == 404
+
+
+def test_get_resource_query(client):
+    for name in ["Padaria", "Farmacia", "Padaria"]:
+        client.post("/mcc", json={"name": name, "tipo": "varejo"})
+
+    resp = client.get("/mcc?name=Padaria&name=Loja&_sort=id&_order=desc&_fields=id,name")
+    assert resp.status_code == 200
+    assert resp.headers["X-Total-Count"] == "3"
+    assert resp.get_json() == [{"id": 4, "name": "Padaria"}, {"id": 2, "name": "Padaria"}, {"id": 1, "name": "Loja"}]
+
+    resp = client.get("/mcc?tipo=varejo&_page=2&_limit=2")
+    assert resp.headers["X-Total-Count"] == "3"
+    assert [item["id"] for item in resp.get_json()] == [4]
+
+    assert client.get("/mcc?_page=x").status_code == 400
+    assert client.get("/mcc?_page=1&_limit=-1").status_code == 400
+    assert client.get("/mcc?_limit=0").status_code == 400
+    assert client.get("/mcc?_page=0").status_code == 400
+
+
+def test_bulk_create_and_patch(client):
+    resp = client.post("/mcc/_bulk?_return=ids", json=[{"name": "Padaria"}, {"name": "Farmacia"}])
+    assert resp.status_code == 201
+    assert resp.get_json() == {"ids": [2, 3]}
+
+    resp = client.patch("/mcc/_bulk", json=[{"id": 2, "name": "Padaria Nova"}, {"id": 99, "name": "X"}])
+    assert resp.status_code == 200
+    assert resp.get_json() == {"updated": [{"id": 2, "name": "Padaria Nova"}], "missing": [99]}
+    assert client.get("/mcc/2").get_json()["name"] == "Padaria Nova"
+
+    assert client.post("/mcc/_bulk", json={"name": "x"}).status_code == 400
+    resp = client.post("/mcc/_bulk", json=[{"id": 9, "name": "A"}, {"id": 9, "name": "B"}])
+    assert resp.status_code == 409
+    assert resp.get_json()["ids"] == [9]
+    assert client.get("/mcc/9").status_code == 404
+    assert client.patch("/mcc/_bulk", json=[{"name": "sem id"}]).status_code == 400
+
+
+def test_import_does_not_open_the_dataset(tmp_path):
+    import subprocess
+    import sys
+    db_path = tmp_path / "db.json"
+    db_path.write_text(json.dumps({"regions": []}))
+    (tmp_path / "db.json.log").write_text(json.dumps({"op": "create", "resource": "regions", "item": {"id": 1}}) + "\n")
+    before = sorted(os.listdir(tmp_path)), db_path.read_text()
+
+    code = "import app; assert app.store is None"
+    subprocess.run([sys.executable, "-c", code], cwd=tmp_path, check=True,
+                   env={**os.environ, "PYTHONPATH": os.path.dirname(os.path.abspath(__file__))})
+
+    assert (sorted(os.listdir(tmp_path)), db_path.read_text()) == before
+
+
+def test_store_is_opened_from_db_path(tmp_path, monkeypatch):
+    import app as app_module
+    db_path = tmp_path / "dados.json"
+    db_path.write_text(json.dumps({"regions": [{"id": 1, "code": "CA"}]}))
+    monkeypatch.setattr(app_module, "DB_PATH", str(db_path))
+    monkeypatch.setattr(app_module, "store", None)
+
+    store = app_module.get_store()
+    assert store.path == str(db_path)
+    assert app_module.get_store() is store
+    assert store.get_item("regions", 1)["code"] == "CA"
+    store.close()
@@ -0,0 +1,146 @@
+import json
+import pytest
+from store import IdConflict, JsonStore
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "db.json"
+    path.write_text(json.dumps({"regions": [{"id": 1, "code": "AL"}, {"id": 2, "code": "AK"}]}))
+    return path
+
+def test_writes_are_logged_and_replayed(db_path):
+    store = JsonStore(str(db_path))
+    store.create("regions", {"code": "AZ"})
+    store.patch("regions", 1, {"name": "Alabama"})
+    store.delete("regions", 2)
+
+    # db.json ainda não foi reescrito; as mudanças estão apenas no log
+    assert json.loads(db_path.read_text())["regions"][1]["code"] == "AK"
+    assert len((db_path.parent / "db.json.log").read_text().splitlines()) == 3
+
+    reopened = JsonStore(str(db_path))
+    assert reopened.get_collection("regions") == [
+        {"id": 1, "code": "AL", "name": "Alabama"},
+        {"id": 3, "code": "AZ"},
+    ]
+
+def test_create_rejects_existing_id(db_path):
+    store = JsonStore(str(db_path))
+    with pytest.raises(IdConflict):
+        store.create("regions", {"id": 1, "code": "XX"})
+    with pytest.raises(IdConflict):
+        store.create("regions", {"id": "2", "code": "XX"})
+    assert store.get_item("regions", 1) == {"id": 1, "code": "AL"}
+    assert len(store.get_collection("regions")) == 2
+
+def test_id_change_to_taken_id_is_rejected(db_path):
+    store = JsonStore(str(db_path))
+    with pytest.raises(IdConflict):
+        store.update("regions", 2, {"id": 1, "code": "AK"})
+    with pytest.raises(IdConflict):
+        store.patch("regions", 1, {"id": 2})
+    assert store.get_collection("regions") == [{"id": 1, "code": "AL"}, {"id": 2, "code": "AK"}]
+    assert store.update("regions", 2, {"id": "2", "code": "AK"})["id"] == "2"
+
+def test_numeric_ids_and_their_strings_are_the_same_id(tmp_path):
+    path = tmp_path / "db.json"
+    path.write_text(json.dumps({"regions": [{"id": 1, "code": "AL"}, {"id": "2", "code": "AK"}]}))
+    store = JsonStore(str(path))
+    assert store.get_item("regions", "01") == {"id": 1, "code": "AL"}
+    assert store.get_item("regions", 2) == {"id": "2", "code": "AK"}
+
+    # O id gerado pula o "2" já existente, em vez de sobrescrevê-lo ao reaplicar o log
+    created = store.create("regions", {"code": "AZ"})
+    assert created["id"] == 3
+    with pytest.raises(IdConflict):
+        store.create("regions", {"id": 2, "code": "XX"})
+
+    reopened = JsonStore(str(path))
+    assert [item["code"] for item in reopened.get_collection("regions")] == ["AL", "AK", "AZ"]
+
+def test_next_id_skips_ids_in_use(db_path):
+    store = JsonStore(str(db_path))
+    store._max_id["regions"] = 0  # ex.: ids gravados como texto não numérico antes
+    assert store.create("regions", {"code": "AZ"})["id"] == 3
+
+def test_compaction_writes_snapshot_and_truncates_log(db_path):
+    store = JsonStore(str(db_path), compact_every=1000)
+    store.create("regions", {"code": "AZ"})
+    store.compact()
+
+    assert json.loads(db_path.read_text())["regions"][-1] == {"id": 3, "code": "AZ"}
+    assert not (db_path.parent / "db.json.log").exists()
+    assert not (db_path.parent / "db.json.log.old").exists()
+
+def test_replay_of_interrupted_compaction_is_idempotent(db_path):
+    store = JsonStore(str(db_path))
+    store.create("regions", {"code": "AZ"})
+    store.update("regions", 1, {"id": 10, "code": "AL"})
+    snapshot = json.dumps(store.snapshot())
+
+    # Simula uma queda depois de gravar o snapshot, mas antes de remover o log rotacionado
+    (db_path.parent / "db.json.log").rename(db_path.parent / "db.json.log.old")
+    db_path.write_text(snapshot)
+    with open(db_path.parent / "db.json.log", "w") as f:
+        f.write('{"op": "delete", "resource": "regions", "id": 2}\n{"op": "cre')
+
+    reopened = JsonStore(str(db_path))
+    assert reopened.get_collection("regions") == [{"id": 10, "code": "AL"}, {"id": 3, "code": "AZ"}]
+    assert json.loads(db_path.read_text()) == reopened.snapshot()
+
+def test_id_index_follows_mutations(db_path):
+    store = JsonStore(str(db_path))
+    for code in ("AZ", "AR", "CA"):
+        store.create("regions", {"code": code})
+
+    store.update("regions", 1, {"id": 10, "code": "AL"})
+    assert store.get_item("regions", 1) is None
+    assert store.get_item("regions", "10")["code"] == "AL"
+
+    # Remoções deixam marcas que são varridas quando chegam à metade da lista
+    store.delete("regions", 2)
+    store.delete("regions", 3)
+    store.delete("regions", 4)
+    assert store.get_item("regions", 3) is None
+    assert store.get_item("regions", 5)["code"] == "CA"
+    assert store.get_collection("regions") == [{"id": 10, "code": "AL"}, {"id": 5, "code": "CA"}]
+    assert store.create("regions", {"code": "CO"})["id"] == 11
+
+
+def test_field_index_follows_mutations(db_path):
+    store = JsonStore(str(db_path))
+    for code in ("AZ", "AR", "AZ"):
+        store.create("regions", {"code": code})
+
+    store.patch("regions", 4, {"code": "AZ"})
+    store.delete("regions", 3)
+    items, total = store.query("regions", filters={"code": ["AZ"]})
+    assert total == 2
+    assert [item["id"] for item in items] == [4, 5]
+    assert store.query("regions", filters={"code": ["AR"]}) == ([], 0)
+
+
+def test_bulk_writes_are_logged_once_and_replayed(db_path):
+    store = JsonStore(str(db_path))
+    created = store.create_many("regions", [{"code": "AZ"}, {"id": 7, "code": "AR"}, {"code": "CA"}])
+    assert [item["id"] for item in created] == [3, 7, 8]
+    patched, missing = store.patch_many("regions", [{"id": 3, "name": "Arizona"}, {"id": 42, "name": "?"}])
+    assert patched == [{"id": 3, "code": "AZ", "name": "Arizona"}]
+    assert missing == [42]
+
+    reloaded = JsonStore(str(db_path))
+    assert reloaded.get_item("regions", 3) == {"id": 3, "code": "AZ", "name": "Arizona"}
+    assert reloaded.get_item("regions", 8)["code"] == "CA"
+
+
+def test_bulk_create_rejects_taken_and_repeated_ids(db_path):
+    store = JsonStore(str(db_path))
+    with pytest.raises(IdConflict) as exc:
+        store.create_many("regions", [{"id": 9, "code": "A"}, {"id": 9, "code": "B"}, {"id": 1, "code": "C"}])
+    assert exc.value.ids == [9, 1]
+    assert store.get_item("regions", 9) is None
+    assert store.get_item("regions", 1) == {"id": 1, "code": "AL"}
+
+    # Ids gerados não colidem com ids explícitos do mesmo lote
+    created = store.create_many("regions", [{"code": "AZ"}, {"id": 3, "code": "AR"}])
+    assert [item["id"] for item in created] == [4, 3]
@@ -0,0 +1,39 @@
+# app/api/endpoints/analytics.py
+import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from app.crud.analytics import get_summary_by_day, get_summary_by_mcc
+from app.db.session import get_db
+from app.schemas.analytics import DailySpendSummary, MccSpendSummary
+
+router = APIRouter(
+    prefix="/transacoes/analytics",
+    tags=["Analytics"]
+)
+
+@router.get("/mcc", response_model=List[MccSpendSummary])
+def resumo_por_mcc(
+    mcc: Optional[str] = None,
+    date_from: Optional[datetime.date] = Query(None, alias="from", description="Primeiro dia (inclusive)"),
+    date_to: Optional[datetime.date] = Query(None, alias="to", description="Dia final (exclusive)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Quantidade, total, média, mínimo e máximo de `valor` por MCC.
+
+    Lido do resumo diário mantido pelo ETL a cada carga, sem percorrer a tabela de transações.
+    `from` / `to` têm o mesmo sentido dos endpoints de transações (`from` inclusive, `to`
+    exclusive), com granularidade de dia.
+    """
+    return get_summary_by_mcc(db, mcc=mcc, date_from=date_from, date_to=date_to)
+
+@router.get("/diario", response_model=List[DailySpendSummary])
+def resumo_diario(
+    mcc: Optional[str] = None,
+    date_from: Optional[datetime.date] = Query(None, alias="from", description="Primeiro dia (inclusive)"),
+    date_to: Optional[datetime.date] = Query(None, alias="to", description="Dia final (exclusive)"),
+    db: Session = Depends(get_db)
+):
+    """Quantidade, total, média, mínimo e máximo de `valor` por dia de processamento, opcionalmente de um MCC."""
+    return get_summary_by_day(db, mcc=mcc, date_from=date_from, date_to=date_to)
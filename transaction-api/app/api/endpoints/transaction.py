@@ -1,20 +1,53 @@
 # app/api/endpoints/transaction.py
-from typing import List
-from fastapi import APIRouter, Depends, status
+import datetime
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.schemas.transaction import TransactionCreate, TransactionResponse
-from app.db.session import get_db
-from app.crud.transaction import get_db_transactions, get_db_transactions_by_mcc
+from app.api.pagination import as_naive_utc, decode_window_cursor, set_next_cursor
+from app.api.serialization import dumps_rows, dumps_rows_ndjson, json_response
+from app.core.config import settings
+from app.schemas.transaction import TransactionCreate, TransactionResponse, TransactionBatchResponse
+from app.db.session import get_async_db, get_db, get_session_factory
+from app.crud.transaction import get_db_transactions, get_db_transactions_by_mcc, stream_db_transactions_by_mcc
 from app.etl.processor import process_and_load_transaction
 from app.etl.processor import process_and_create_transaction_with_mcc_request
+from app.etl.processor import ensure_regions_loaded, extract_batch_records, process_and_load_transaction_batch
+from app.etl.export import ExportFormatUnavailable, FILE_EXTENSIONS, MEDIA_TYPES, check_format, iter_export
+from app.etl.write_queue import write_queue
 
 router = APIRouter(
     prefix="/transacoes",
     tags=["Transações"]
 )
 
+STREAM_BATCH_SIZE = 1000
+
+# Janela de data de processamento: from <= data < to
+DATE_FROM_QUERY = Query(None, alias="from", description="Data de processamento inicial (inclusive)")
+DATE_TO_QUERY = Query(None, alias="to", description="Data de processamento final (exclusive)")
+
+def _stream_transactions_by_mcc_ndjson(session_factory, mcc: str, limit: Optional[int],
+                                       after_id: Optional[int], after_data: Optional[datetime.datetime],
+                                       date_from: Optional[datetime.datetime], date_to: Optional[datetime.datetime]):
+    """Gera o corpo NDJSON em blocos, lendo as linhas do cursor à medida que são enviadas."""
+    with session_factory() as db:
+        rows = []
+        for row in stream_db_transactions_by_mcc(
+            db, mcc, limit=limit, after_id=after_id, batch_size=STREAM_BATCH_SIZE,
+            date_from=date_from, date_to=date_to, as_rows=True, after_data=after_data
+        ):
+            rows.append(row)
+            if len(rows) == STREAM_BATCH_SIZE:
+                yield dumps_rows_ndjson(rows)
+                rows = []
+        if rows:
+            yield dumps_rows_ndjson(rows)
+
 @router.post("/", response_model=TransactionResponse, status_code=status.HTTP_201_CREATED)
-def cadastrar_transacao(
+async def cadastrar_transacao(
     transaction: TransactionCreate,
     db: Session = Depends(get_db)
 ):
@@ -24,38 +57,180 @@ def cadastrar_transacao(
     - **nome**: Nome do estabelecimento.
     - **mcc**: Código de Categoria do Comerciante.
     - **valor**: Valor da transação.
+
+    Com `WRITE_QUEUE_ENABLED`, a transação é gravada junto com as de outras requisições
+    concorrentes em um único commit (group commit); a resposta é a mesma.
     """
-    created_transaction = process_and_load_transaction(db, transaction)
+    await ensure_regions_loaded([transaction])
+    if write_queue.running:
+        return await write_queue.submit(transaction)
+    created_transaction = await run_in_threadpool(process_and_load_transaction, db, transaction)
     return created_transaction
 
 @router.post("/with-mcc", response_model=TransactionResponse, status_code=status.HTTP_201_CREATED)
 async def cadastrar_transacao_mcc(
         transaction: TransactionCreate,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     created_transaction = await process_and_create_transaction_with_mcc_request(db, transaction)
     return created_transaction
 
 
+@router.post(
+    "/batch",
+    response_model=TransactionBatchResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {"type": "array", "items": {"$ref": "#/components/schemas/TransactionCreate"}}
+                },
+                "application/x-ndjson": {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def cadastrar_transacoes_em_lote(
+        request: Request,
+        db: Session = Depends(get_db)
+):
+    """
+    Endpoint para cadastrar transações em lote.
+
+    Aceita um array JSON de transações ou um corpo NDJSON (`application/x-ndjson`), com uma
+    transação por linha. Cada registro recebe um resultado individual: `created`, `conflict`
+    ou `invalid`.
+    """
+    records = extract_batch_records(await request.body(), request.headers.get("content-type", ""))
+    await ensure_regions_loaded(records)
+
+    results = []
+    batch_size = settings.TRANSACTION_BATCH_SIZE
+    for start in range(0, len(records), batch_size):
+        results.extend(await run_in_threadpool(
+            process_and_load_transaction_batch, db, records[start:start + batch_size], start
+        ))
+
+    return TransactionBatchResponse(
+        created=sum(1 for result in results if result.status == "created"),
+        conflicts=sum(1 for result in results if result.status == "conflict"),
+        invalid=sum(1 for result in results if result.status == "invalid"),
+        results=results
+    )
+
+
 @router.get("/", response_model=List[TransactionResponse])
 def consultar_transacoes(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    date_from: Optional[datetime.datetime] = DATE_FROM_QUERY,
+    date_to: Optional[datetime.datetime] = DATE_TO_QUERY,
     db: Session = Depends(get_db)
 ):
     """
     Endpoint para consultar todas as transações cadastradas com paginação.
+
+    Quando a página vem cheia, o cabeçalho `X-Next-Cursor` traz o cursor da próxima página.
+    Enviá-lo em `cursor` percorre a tabela com custo constante por página; `skip` continua
+    disponível para compatibilidade. `from` / `to` restringem à janela de data de processamento;
+    nesse caso a listagem é ordenada por data (e id).
     """
-    transactions = get_db_transactions(db, skip=skip, limit=limit)
-    return transactions
+    date_from, date_to = as_naive_utc(date_from), as_naive_utc(date_to)
+    by_date = date_from is not None or date_to is not None
+    after_id, after_data = decode_window_cursor(cursor, by_date)
+    rows = get_db_transactions(
+        db, skip=skip, limit=limit, after_id=after_id, date_from=date_from, date_to=date_to, as_rows=True,
+        after_data=after_data
+    )
+    # Caminho rápido: tuplas de colunas serializadas direto em bytes, sem ORM nem response_model
+    response = json_response(dumps_rows(rows))
+    set_next_cursor(response, rows, limit, by_date)
+    return response
 
-@router.get("/mcc", response_model=List[TransactionResponse], tags=["MCC"])
+@router.get(
+    "/mcc",
+    response_model=List[TransactionResponse],
+    tags=["MCC"],
+    responses={200: {"content": {"application/x-ndjson": {}}}},
+)
 def consultar_por_mcc(
         mcc: str,
-        db: Session = Depends(get_db)
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        stream: bool = False,
+        date_from: Optional[datetime.datetime] = DATE_FROM_QUERY,
+        date_to: Optional[datetime.datetime] = DATE_TO_QUERY,
+        db: Session = Depends(get_db),
+        session_factory=Depends(get_session_factory)
 ):
     """
     Endpoint para consultar transações por Código de Categoria do Comerciante (MCC).
+
+    - **limit** / **cursor**: paginação por cursor; o cabeçalho `X-Next-Cursor` traz a próxima página.
+    - **from** / **to**: janela de data de processamento (`from` inclusive, `to` exclusive);
+      nesse caso as transações vêm ordenadas por data (e id).
+    - **stream**: devolve NDJSON (uma transação por linha) lido do banco à medida que é enviado,
+      com uso de memória constante independentemente da quantidade de transações.
     """
-    transactions = get_db_transactions_by_mcc(db, mcc)
-    return transactions
\ No newline at end of file
+    date_from, date_to = as_naive_utc(date_from), as_naive_utc(date_to)
+    by_date = date_from is not None or date_to is not None
+    after_id, after_data = decode_window_cursor(cursor, by_date)
+    if stream:
+        return StreamingResponse(
+            _stream_transactions_by_mcc_ndjson(session_factory, mcc, limit, after_id, after_data, date_from, date_to),
+            media_type="application/x-ndjson"
+        )
+
+    rows = get_db_transactions_by_mcc(
+        db, mcc, limit=limit, after_id=after_id, date_from=date_from, date_to=date_to, as_rows=True,
+        after_data=after_data
+    )
+    response = json_response(dumps_rows(rows))
+    if limit is not None:
+        set_next_cursor(response, rows, limit, by_date)
+    return response
+
+
+EXPORT_BATCH_SIZE = 10_000
+
+def _stream_export(session_factory, file_format: str, mcc: Optional[str],
+                   date_from: Optional[datetime.datetime], date_to: Optional[datetime.datetime]):
+    """Gera a exportação em blocos, com uma sessão própria que vive enquanto o corpo é enviado."""
+    with session_factory() as db:
+        yield from iter_export(
+            db, file_format, mcc=mcc, date_from=date_from, date_to=date_to, batch_size=EXPORT_BATCH_SIZE
+        )
+
+@router.get(
+    "/export",
+    responses={200: {"content": {media_type: {} for media_type in MEDIA_TYPES.values()}}},
+)
+def exportar_transacoes(
+        format: Literal["csv", "arrow", "parquet"] = "csv",
+        mcc: Optional[str] = None,
+        date_from: Optional[datetime.datetime] = DATE_FROM_QUERY,
+        date_to: Optional[datetime.datetime] = DATE_TO_QUERY,
+        session_factory=Depends(get_session_factory)
+):
+    """
+    Endpoint para exportar a tabela de transações, opcionalmente filtrada por MCC e período.
+
+    - **format**: `csv` (compactado com gzip), `arrow` (Arrow IPC stream) ou `parquet`.
+      Os formatos colunares dependem do pyarrow instalado no servidor (501 caso contrário).
+
+    As linhas são lidas de um cursor no servidor e enviadas em blocos, com uso de memória
+    constante independentemente do tamanho da tabela.
+    """
+    date_from, date_to = as_naive_utc(date_from), as_naive_utc(date_to)
+    try:
+        check_format(format)
+    except ExportFormatUnavailable as exc:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(exc))
+
+    return StreamingResponse(
+        _stream_export(session_factory, format, mcc, date_from, date_to),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="transacoes{FILE_EXTENSIONS[format]}"'}
+    )
@@ -0,0 +1,74 @@
+# app/api/pagination.py
+import base64
+import binascii
+import datetime
+import json
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, Response, status
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def as_naive_utc(value: Optional[datetime.datetime]) -> Optional[datetime.datetime]:
+    """
+    Converte uma data com fuso para UTC sem fuso, o formato da coluna `data`; datas sem fuso
+    ficam como estão. Assim `from` / `to` e o cursor podem ser comparados entre si e com o banco.
+    """
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def encode_cursor(last_id: int, last_data: Optional[datetime.datetime] = None) -> str:
+    """
+    Gera o cursor opaco que aponta para a página seguinte ao registro `last_id`. Em consultas
+    por período (ordenadas por data) o cursor também guarda a `data` do registro.
+    """
+    payload = {"id": last_id}
+    if last_data is not None:
+        payload["data"] = last_data.isoformat()
+    encoded = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(encoded).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, Optional[datetime.datetime]]:
+    """Extrai o último (id, data) visto de um cursor gerado por `encode_cursor`; data pode ser None."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        last_id = payload["id"]
+        last_data = as_naive_utc(datetime.datetime.fromisoformat(payload["data"])) if "data" in payload else None
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        last_id = None
+    if not isinstance(last_id, int):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginação inválido."
+        )
+    return last_id, last_data
+
+
+def decode_window_cursor(cursor: Optional[str], by_date: bool) -> Tuple[Optional[int], Optional[datetime.datetime]]:
+    """
+    Decodifica o cursor de uma listagem: ordenada por id ou, com `by_date` (filtro de período),
+    por (data, id). Um cursor sem data não serve para continuar uma listagem por período.
+    """
+    if not cursor:
+        return None, None
+    last_id, last_data = decode_cursor(cursor)
+    if not by_date:
+        return last_id, None
+    if last_data is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginação inválido para uma consulta por período."
+        )
+    return last_id, last_data
+
+
+def set_next_cursor(response: Response, page: list, limit: int, by_date: bool = False) -> None:
+    """Informa o cursor da próxima página no cabeçalho quando a página veio cheia."""
+    if page and len(page) == limit:
+        last = page[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.id, last.data if by_date else None)
@@ -0,0 +1,50 @@
+# app/api/serialization.py
+"""
+Serialização direta de linhas (tuplas de RESPONSE_COLUMNS) para JSON, sem construir objetos
+do ORM nem validar cada linha no TransactionResponse. Usa orjson quando instalado e o
+módulo json da biblioteca padrão caso contrário; a saída segue o mesmo formato da resposta
+gerada pelo FastAPI (mesmos campos, na mesma ordem, datas em ISO 8601).
+"""
+import datetime
+import json
+from typing import Iterable, Sequence
+
+from fastapi.responses import Response
+from app.schemas.transaction import TransactionResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson é opcional
+    orjson = None
+
+TRANSACTION_FIELDS = tuple(TransactionResponse.model_fields)
+
+
+def _default(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+def row_to_dict(row: Sequence) -> dict:
+    return dict(zip(TRANSACTION_FIELDS, row))
+
+
+def dumps_rows(rows: Iterable[Sequence]) -> bytes:
+    """Array JSON de transações a partir de linhas na ordem de TRANSACTION_FIELDS."""
+    return dumps([row_to_dict(row) for row in rows])
+
+
+def dumps_rows_ndjson(rows: Iterable[Sequence]) -> bytes:
+    """Uma transação JSON por linha (NDJSON)."""
+    return b"".join(dumps(row_to_dict(row)) + b"\n" for row in rows)
+
+
+def json_response(content: bytes) -> Response:
+    return Response(content=content, media_type="application/json")
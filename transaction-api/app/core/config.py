@@ -1,6 +1,76 @@
 # app/core/config.py
+from typing import Optional
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
-class Settings:
-    SQLALCHEMY_DATABASE_URL = "sqlite:///./transactions.db"
 
-settings = Settings()
\ No newline at end of file
+class Settings(BaseSettings):
+    """
+    Configuração da aplicação. Cada atributo pode ser sobrescrito por uma variável de
+    ambiente de mesmo nome (ex.: SQLALCHEMY_DATABASE_URL=postgresql://...) ou pelo arquivo .env.
+    """
+
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
+
+    SQLALCHEMY_DATABASE_URL: str = "sqlite:///./transactions.db"
+    # Pool de conexões (ignorado para SQLite em memória, que usa uma única conexão).
+    # DB_POOL_TIMEOUT: espera máxima (s) por uma conexão livre; DB_POOL_RECYCLE: idade máxima
+    # (s) de uma conexão, -1 desativa; DB_POOL_PRE_PING testa a conexão antes de usá-la
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = -1
+    DB_POOL_PRE_PING: bool = False
+    # Timeouts do banco: conexão (s) e, no PostgreSQL, tempo máximo de cada comando (ms)
+    DB_CONNECT_TIMEOUT: float = 10
+    DB_STATEMENT_TIMEOUT: Optional[int] = None
+    # Loga todo o SQL executado
+    DB_ECHO: bool = False
+    # Cache de comandos compilados do SQLAlchemy e, no asyncpg, de prepared statements
+    DB_STATEMENT_CACHE_SIZE: int = 500
+    # Perfil de desempenho do SQLite, aplicado a cada nova conexão. Com WAL, leitores não
+    # bloqueiam o escritor (e vice-versa); synchronous=NORMAL só sincroniza o disco nos
+    # checkpoints do WAL. SQLITE_CACHE_SIZE negativo é em KiB; SQLITE_BUSY_TIMEOUT em ms.
+    # Use None para manter o padrão do SQLite em qualquer um deles.
+    SQLITE_JOURNAL_MODE: Optional[str] = "WAL"
+    SQLITE_SYNCHRONOUS: Optional[str] = "NORMAL"
+    SQLITE_CACHE_SIZE: Optional[int] = -64_000
+    SQLITE_MMAP_SIZE: Optional[int] = 256 * 1024 * 1024
+    SQLITE_TEMP_STORE: Optional[str] = "MEMORY"
+    SQLITE_BUSY_TIMEOUT: Optional[int] = 5000
+    # Quantidade máxima de registros por INSERT/commit na carga em lote
+    TRANSACTION_BATCH_SIZE: int = 1000
+    # Group commit do POST /transacoes/: inserções concorrentes são agrupadas e gravadas em um
+    # único commit a cada WRITE_QUEUE_MAX_DELAY_MS milissegundos ou WRITE_QUEUE_MAX_BATCH registros
+    WRITE_QUEUE_ENABLED: bool = False
+    WRITE_QUEUE_MAX_BATCH: int = 500
+    WRITE_QUEUE_MAX_DELAY_MS: float = 5
+    # Pré-filtro probabilístico (Bloom) da regra de duplicidade (nome, valor)
+    DEDUP_FILTER_ENABLED: bool = False
+    DEDUP_FILTER_CAPACITY: int = 10_000_000
+    DEDUP_FILTER_ERROR_RATE: float = 0.001
+    # Cliente da mcc-api: pool de conexões, timeouts (segundos) e cache
+    MCC_API_URL: str = "http://127.0.0.1:8001"
+    MCC_API_TIMEOUT: float = 5.0
+    MCC_API_MAX_CONNECTIONS: int = 20
+    MCC_API_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    MCC_CACHE_TTL: float = 3600
+    MCC_CACHE_NEGATIVE_TTL: float = 60
+    MCC_CACHE_MAX_SIZE: int = 1024
+    # Snapshot local da tabela de MCC: carregado na inicialização e atualizado periodicamente,
+    # a partir da mcc-api (GET /mcc) ou, se informado, direto de um arquivo mcc.json
+    MCC_SNAPSHOT_ENABLED: bool = False
+    MCC_SNAPSHOT_FILE: Optional[str] = None
+    MCC_SNAPSHOT_REFRESH_INTERVAL: float = 300
+    # Enriquecimento por região: a tabela de regiões da regions-api é pequena, então é mantida
+    # inteira em memória (GET /regions) e renovada em segundo plano após REGIONS_CACHE_MAX_AGE;
+    # se a regions-api falhar, a cópia anterior continua em uso e a busca só é tentada de novo
+    # após REGIONS_RETRY_INTERVAL segundos. Desligado por padrão: depende da regions-api no ar
+    # e, enquanto a tabela nunca pôde ser carregada, transações com `regiao` são recusadas
+    REGIONS_ENRICHMENT_ENABLED: bool = False
+    REGIONS_API_URL: str = "http://127.0.0.1:5000"
+    REGIONS_API_TIMEOUT: float = 2.0
+    REGIONS_API_MAX_CONNECTIONS: int = 5
+    REGIONS_CACHE_MAX_AGE: float = 3600
+    REGIONS_RETRY_INTERVAL: float = 30
+
+settings = Settings()
@@ -0,0 +1,174 @@
+# app/crud/analytics.py
+import datetime
+import logging
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import case, delete, exists, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.models.analytics import TransactionDailySummary as Summary
+from app.models.transaction import Transaction
+
+logger = logging.getLogger(__name__)
+
+def _aggregate(rows: Iterable) -> List[dict]:
+    """Agrupa as transações recém-inseridas por (mcc, dia), no formato da tabela de resumo."""
+    groups: Dict[Tuple[str, datetime.date], dict] = {}
+    for row in rows:
+        key = (row.mcc, row.data.date())
+        group = groups.get(key)
+        if group is None:
+            groups[key] = {
+                "mcc": row.mcc, "dia": key[1], "quantidade": 1,
+                "total": row.valor, "valor_minimo": row.valor, "valor_maximo": row.valor,
+            }
+        else:
+            group["quantidade"] += 1
+            group["total"] += row.valor
+            group["valor_minimo"] = min(group["valor_minimo"], row.valor)
+            group["valor_maximo"] = max(group["valor_maximo"], row.valor)
+    return list(groups.values())
+
+# Bancos com INSERT ... ON CONFLICT; nos demais o resumo é atualizado linha a linha (_merge_group)
+UPSERT_DIALECTS = {"sqlite": sqlite, "postgresql": postgresql}
+
+def _upsert_statement(dialect_name: str):
+    """INSERT ... ON CONFLICT (mcc, dia) DO UPDATE que soma o lote ao agregado existente, ou None."""
+    dialect = UPSERT_DIALECTS.get(dialect_name)
+    if dialect is None:
+        return None
+    stmt = dialect.insert(Summary)
+    excluded = stmt.excluded
+    return stmt.on_conflict_do_update(
+        index_elements=[Summary.mcc, Summary.dia],
+        set_={
+            "quantidade": Summary.quantidade + excluded.quantidade,
+            "total": Summary.total + excluded.total,
+            "valor_minimo": case((excluded.valor_minimo < Summary.valor_minimo, excluded.valor_minimo), else_=Summary.valor_minimo),
+            "valor_maximo": case((excluded.valor_maximo > Summary.valor_maximo, excluded.valor_maximo), else_=Summary.valor_maximo),
+        },
+    )
+
+def _locked_summary(group: dict):
+    """SELECT ... FOR UPDATE do agregado (mcc, dia) do grupo, para somá-lo sem corrida."""
+    return select(Summary).where(Summary.mcc == group["mcc"], Summary.dia == group["dia"]).with_for_update()
+
+def _merge_group(db, summary: Optional[Summary], group: dict) -> None:
+    if summary is None:
+        db.add(Summary(**group))
+        return
+    summary.quantidade += group["quantidade"]
+    summary.total += group["total"]
+    summary.valor_minimo = min(summary.valor_minimo, group["valor_minimo"])
+    summary.valor_maximo = max(summary.valor_maximo, group["valor_maximo"])
+
+def add_to_daily_summary(db: Session, rows: Iterable) -> None:
+    """
+    Soma transações recém-inseridas (linhas com mcc, valor e data) ao resumo diário, na
+    mesma transação do INSERT; o commit fica a cargo de quem chamou. Sem ON CONFLICT no
+    banco, cada agregado é lido com SELECT ... FOR UPDATE e atualizado (ou inserido).
+    """
+    groups = _aggregate(rows)
+    if not groups:
+        return
+    stmt = _upsert_statement(db.get_bind().dialect.name)
+    if stmt is not None:
+        db.execute(stmt, groups)
+        return
+    for group in groups:
+        _merge_group(db, db.scalars(_locked_summary(group)).first(), group)
+
+async def add_to_daily_summary_async(db: AsyncSession, rows: Iterable) -> None:
+    """Versão assíncrona de add_to_daily_summary."""
+    groups = _aggregate(rows)
+    if not groups:
+        return
+    stmt = _upsert_statement(db.get_bind().dialect.name)
+    if stmt is not None:
+        await db.execute(stmt, groups)
+        return
+    for group in groups:
+        _merge_group(db, (await db.scalars(_locked_summary(group))).first(), group)
+
+def _summarized_transactions():
+    """As transações que entram no resumo (com mcc e data)."""
+    return (Transaction.mcc.is_not(None), Transaction.data.is_not(None))
+
+def rebuild_daily_summary(db: Session) -> None:
+    """Recalcula o resumo diário inteiro a partir da tabela de transações."""
+    db.execute(delete(Summary))
+    dia = func.date(Transaction.data)
+    db.execute(
+        insert(Summary).from_select(
+            ["mcc", "dia", "quantidade", "total", "valor_minimo", "valor_maximo"],
+            select(
+                Transaction.mcc, dia, func.count(), func.sum(Transaction.valor),
+                func.min(Transaction.valor), func.max(Transaction.valor),
+            ).where(*_summarized_transactions()).group_by(Transaction.mcc, dia),
+        )
+    )
+    db.commit()
+
+def daily_summary_diverges(db: Session) -> bool:
+    """
+    Compara a quantidade e a soma de `valor` das transações com os totais do resumo. Diverge
+    quando transações foram gravadas sem passar por add_to_daily_summary (ex.: o main.py da
+    raiz, cargas manuais ou uma queda entre o INSERT e o upsert de outro processo).
+    """
+    quantidade, total = db.execute(
+        select(func.count(), func.coalesce(func.sum(Transaction.valor), 0.0)).where(*_summarized_transactions())
+    ).one()
+    resumo_quantidade, resumo_total = db.execute(
+        select(func.coalesce(func.sum(Summary.quantidade), 0), func.coalesce(func.sum(Summary.total), 0.0))
+    ).one()
+    return quantidade != resumo_quantidade or not math.isclose(total, resumo_total, rel_tol=1e-9, abs_tol=1e-6)
+
+def ensure_daily_summary(db: Session) -> bool:
+    """
+    Reconstrói o resumo quando ele não bate com a tabela de transações (inclusive quando está
+    vazio, ex.: banco anterior ao resumo). Retorna True quando reconstruiu.
+    """
+    if not daily_summary_diverges(db):
+        return False
+    logger.warning("Resumo diário divergente da tabela de transações; reconstruindo")
+    rebuild_daily_summary(db)
+    return True
+
+def _summary_columns():
+    quantidade = func.sum(Summary.quantidade)
+    total = func.sum(Summary.total)
+    return (
+        quantidade.label("quantidade"),
+        total.label("total"),
+        (total / quantidade).label("media"),
+        func.min(Summary.valor_minimo).label("valor_minimo"),
+        func.max(Summary.valor_maximo).label("valor_maximo"),
+    )
+
+def _filter(stmt, mcc: Optional[str], date_from: Optional[datetime.date], date_to: Optional[datetime.date]):
+    """Restringe à janela date_from <= dia < date_to, o mesmo sentido de from/to nas transações."""
+    if mcc is not None:
+        stmt = stmt.where(Summary.mcc == mcc)
+    if date_from is not None:
+        stmt = stmt.where(Summary.dia >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(Summary.dia < date_to)
+    return stmt
+
+def get_summary_by_mcc(
+    db: Session, mcc: Optional[str] = None,
+    date_from: Optional[datetime.date] = None, date_to: Optional[datetime.date] = None,
+) -> List[Row]:
+    """Quantidade, total, média, mínimo e máximo de `valor` por MCC, lidos do resumo (O(grupos))."""
+    stmt = select(Summary.mcc, *_summary_columns()).group_by(Summary.mcc).order_by(Summary.mcc)
+    return db.execute(_filter(stmt, mcc, date_from, date_to)).all()
+
+def get_summary_by_day(
+    db: Session, mcc: Optional[str] = None,
+    date_from: Optional[datetime.date] = None, date_to: Optional[datetime.date] = None,
+) -> List[Row]:
+    """Quantidade, total, média, mínimo e máximo de `valor` por dia, opcionalmente de um MCC."""
+    stmt = select(Summary.dia, *_summary_columns()).group_by(Summary.dia).order_by(Summary.dia)
+    return db.execute(_filter(stmt, mcc, date_from, date_to)).all()
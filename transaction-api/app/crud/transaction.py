@@ -1,29 +1,212 @@
 # app/crud/transaction.py
 import datetime
+from typing import Iterable, Iterator, List, Optional, Set, Tuple
+from sqlalchemy import and_, insert, or_, select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from app.crud.analytics import add_to_daily_summary, add_to_daily_summary_async
 from app.models.transaction import Transaction
-from app.schemas.transaction import TransactionCreate
+from app.schemas.transaction import TransactionCreate, TransactionResponse
+
+# Colunas devolvidas pelo INSERT ... RETURNING: a resposta sai do próprio INSERT, sem um SELECT extra
+RETURNED_COLUMNS = (
+    Transaction.id, Transaction.nome, Transaction.mcc, Transaction.valor, Transaction.data, Transaction.regiao
+)
+
+# Colunas do TransactionResponse, na ordem dos campos: consultas com `as_rows=True` devolvem
+# tuplas prontas para serializar, sem montar objetos do ORM
+RESPONSE_COLUMNS = tuple(getattr(Transaction, field) for field in TransactionResponse.model_fields)
+
+# Colunas da exportação, em ordem explícita (a da tabela, com id primeiro), independente da
+# ordem dos campos do TransactionResponse
+EXPORT_COLUMNS = (
+    Transaction.id, Transaction.nome, Transaction.mcc, Transaction.valor, Transaction.data, Transaction.regiao
+)
+
+def _entities(as_rows: bool):
+    return RESPONSE_COLUMNS if as_rows else (Transaction,)
 
 def get_transaction_by_name_and_value(db: Session, nome: str, valor: float):
     """Busca uma transação específica para evitar duplicatas simples."""
     return db.query(Transaction).filter(Transaction.nome == nome, Transaction.valor == valor).first()
 
-def create_db_transaction(db: Session, transaction: TransactionCreate, processing_date: datetime.datetime):
-    """Cria e salva uma nova transação no banco de dados."""
-    db_transaction = Transaction(
-        nome=transaction.nome,
-        mcc=transaction.mcc,
-        valor=transaction.valor,
-        data=processing_date
+async def get_transaction_by_name_and_value_async(db: AsyncSession, nome: str, valor: float):
+    """Versão assíncrona de get_transaction_by_name_and_value."""
+    result = await db.execute(
+        select(Transaction).where(Transaction.nome == nome, Transaction.valor == valor).limit(1)
+    )
+    return result.scalars().first()
+
+def get_existing_name_value_pairs(db: Session, pairs: Iterable[Tuple[str, float]]) -> Set[Tuple[str, float]]:
+    """Retorna, em uma única consulta, os pares (nome, valor) do lote que já existem no banco."""
+    pairs = set(pairs)
+    if not pairs:
+        return set()
+    rows = db.query(Transaction.nome, Transaction.valor).filter(
+        tuple_(Transaction.nome, Transaction.valor).in_(pairs)
+    ).all()
+    return {(row.nome, row.valor) for row in rows}
+
+def _insert_ignoring_duplicates(db: Session):
+    """INSERT que ignora linhas barradas pelo índice único (nome, valor), quando o banco suporta."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        return sqlite.insert(Transaction).on_conflict_do_nothing()
+    if dialect == "postgresql":
+        return postgresql.insert(Transaction).on_conflict_do_nothing()
+    return insert(Transaction)
+
+def _transaction_values(transaction: TransactionCreate, processing_date: datetime.datetime) -> dict:
+    return {
+        "nome": transaction.nome,
+        "mcc": transaction.mcc,
+        "valor": transaction.valor,
+        "data": processing_date,
+        "regiao": transaction.regiao,
+    }
+
+def create_db_transaction(db: Session, transaction: TransactionCreate, processing_date: datetime.datetime) -> Row:
+    """
+    Cria e salva uma nova transação no banco de dados com um único INSERT ... RETURNING
+    (SQLite >= 3.35, PostgreSQL), sem o SELECT de db.refresh após o commit. O resumo
+    diário (analytics) é atualizado na mesma transação.
+    """
+    row = db.execute(
+        insert(Transaction).values(**_transaction_values(transaction, processing_date)).returning(*RETURNED_COLUMNS)
+    ).one()
+    add_to_daily_summary(db, [row])
+    db.commit()
+    return row
+
+async def create_db_transaction_async(db: AsyncSession, transaction: TransactionCreate, processing_date: datetime.datetime) -> Row:
+    """Versão assíncrona de create_db_transaction."""
+    result = await db.execute(
+        insert(Transaction).values(**_transaction_values(transaction, processing_date)).returning(*RETURNED_COLUMNS)
     )
-    db.add(db_transaction)
+    row = result.one()
+    await add_to_daily_summary_async(db, [row])
+    await db.commit()
+    return row
+
+def create_db_transactions_bulk(db: Session, transactions: List[TransactionCreate], processing_date: datetime.datetime) -> List[Row]:
+    """
+    Salva um lote de transações com um único INSERT multi-linhas e um único commit, junto
+    com a atualização do resumo diário.
+    Linhas que já existem no índice único (nome, valor) são ignoradas e não retornadas;
+    a ordem das linhas retornadas não é garantida.
+    """
+    if not transactions:
+        return []
+    rows = db.execute(
+        _insert_ignoring_duplicates(db).returning(*RETURNED_COLUMNS),
+        [_transaction_values(transaction, processing_date) for transaction in transactions]
+    ).all()
+    add_to_daily_summary(db, rows)
     db.commit()
-    db.refresh(db_transaction)
-    return db_transaction
+    return rows
+
+def _filter_by_date(query, date_from: Optional[datetime.datetime], date_to: Optional[datetime.datetime]):
+    """Restringe à janela date_from <= data < date_to (índices em data e em (mcc, data))."""
+    if date_from is not None:
+        query = query.where(Transaction.data >= date_from)
+    if date_to is not None:
+        query = query.where(Transaction.data < date_to)
+    return query
+
+def _is_date_window(date_from: Optional[datetime.datetime], date_to: Optional[datetime.datetime]) -> bool:
+    return date_from is not None or date_to is not None
+
+def _order_and_seek(
+    query, date_from: Optional[datetime.datetime], date_to: Optional[datetime.datetime],
+    after_id: Optional[int] = None, after_data: Optional[datetime.datetime] = None,
+):
+    """
+    Ordena e aplica o cursor (keyset) de uma listagem.
+
+    Sem período, a ordem e o cursor são por id (índice da chave primária). Com período, são
+    por (data, id): a ordem é a do índice de data / (mcc, data), que no SQLite já termina no
+    rowid, então a consulta é uma busca por intervalo sem ordenação extra. O cursor então
+    traz a `data` do último registro, que vira o início do intervalo.
+    """
+    if not _is_date_window(date_from, date_to):
+        if after_id is not None:
+            query = query.where(Transaction.id > after_id)
+        return query.order_by(Transaction.id)
+
+    if after_id is not None:
+        if after_data is None:
+            raise ValueError("Em consultas por período o cursor precisa de after_data")
+        date_from = after_data if date_from is None else max(date_from, after_data)
+        query = query.where(or_(
+            Transaction.data > after_data, and_(Transaction.data == after_data, Transaction.id > after_id)
+        ))
+    return _filter_by_date(query, date_from, date_to).order_by(Transaction.data, Transaction.id)
 
-def get_db_transactions(db: Session, skip: int = 0, limit: int = 100):
-    """Retorna uma lista de transações do banco de dados."""
-    return db.query(Transaction).offset(skip).limit(limit).all()
+def get_db_transactions(
+    db: Session, skip: int = 0, limit: int = 100, after_id: Optional[int] = None,
+    date_from: Optional[datetime.datetime] = None, date_to: Optional[datetime.datetime] = None,
+    as_rows: bool = False, after_data: Optional[datetime.datetime] = None,
+):
+    """
+    Retorna uma lista de transações do banco de dados, ordenadas por id ou, com `date_from` /
+    `date_to` (data de processamento), por (data, id).
+
+    Com `after_id` (e, em consultas por período, `after_data`) a paginação é por cursor
+    (keyset): a consulta começa direto no índice, sem ler e descartar as `skip` linhas
+    anteriores. Com `as_rows` devolve tuplas de RESPONSE_COLUMNS.
+    """
+    query = _order_and_seek(db.query(*_entities(as_rows)), date_from, date_to, after_id, after_data)
+    if after_id is None:
+        query = query.offset(skip)
+    return query.limit(limit).all()
+
+def get_db_transactions_by_mcc(
+    db: Session, mcc: str, limit: Optional[int] = None, after_id: Optional[int] = None,
+    date_from: Optional[datetime.datetime] = None, date_to: Optional[datetime.datetime] = None,
+    as_rows: bool = False, after_data: Optional[datetime.datetime] = None,
+):
+    """
+    Retorna as transações de um MCC ordenadas por id (ou por (data, id) quando filtradas por
+    período), opcionalmente paginadas por cursor.
+    """
+    query = _order_and_seek(
+        db.query(*_entities(as_rows)).filter(Transaction.mcc == mcc), date_from, date_to, after_id, after_data
+    )
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
+def stream_db_transactions_by_mcc(
+    db: Session, mcc: str, limit: Optional[int] = None, after_id: Optional[int] = None, batch_size: int = 1000,
+    date_from: Optional[datetime.datetime] = None, date_to: Optional[datetime.datetime] = None,
+    as_rows: bool = False, after_data: Optional[datetime.datetime] = None,
+) -> Iterator[Transaction]:
+    """
+    Percorre as transações de um MCC com um cursor no servidor, buscando `batch_size`
+    linhas por vez em vez de carregar o resultado inteiro na memória.
+    """
+    stmt = _order_and_seek(
+        select(*_entities(as_rows)).where(Transaction.mcc == mcc), date_from, date_to, after_id, after_data
+    )
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    stmt = stmt.execution_options(yield_per=batch_size)
+    return iter(db.execute(stmt) if as_rows else db.scalars(stmt))
 
-def get_db_transactions_by_mcc(db: Session, mcc: str):
-    return db.query(Transaction).filter(Transaction.mcc == mcc).all()
\ No newline at end of file
+def iter_db_transaction_batches(
+    db: Session, mcc: Optional[str] = None,
+    date_from: Optional[datetime.datetime] = None, date_to: Optional[datetime.datetime] = None,
+    batch_size: int = 10_000,
+) -> Iterator[List[Row]]:
+    """
+    Percorre a tabela inteira (ou um MCC / período) com um cursor no servidor, em ordem de id
+    ou, com período, de (data, id), entregando blocos de até `batch_size` tuplas de
+    EXPORT_COLUMNS: uma única leitura sequencial com memória limitada, usada pela exportação.
+    """
+    stmt = select(*EXPORT_COLUMNS)
+    if mcc is not None:
+        stmt = stmt.where(Transaction.mcc == mcc)
+    stmt = _order_and_seek(stmt, date_from, date_to)
+    return db.execute(stmt.execution_options(yield_per=batch_size)).partitions()
@@ -1,13 +1,150 @@
 # app/db/session.py
-from sqlalchemy import create_engine
+import logging
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.db.base import Base
 
-engine = create_engine(
-    settings.SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+logger = logging.getLogger(__name__)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def get_sqlite_pragmas() -> dict:
+    """The SQLite performance profile from the settings, skipping pragmas set to None."""
+    pragmas = {
+        "journal_mode": settings.SQLITE_JOURNAL_MODE,
+        "synchronous": settings.SQLITE_SYNCHRONOUS,
+        "cache_size": settings.SQLITE_CACHE_SIZE,
+        "mmap_size": settings.SQLITE_MMAP_SIZE,
+        "temp_store": settings.SQLITE_TEMP_STORE,
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT,
+    }
+    return {name: value for name, value in pragmas.items() if value is not None}
+
+def apply_sqlite_pragmas(sync_engine: Engine) -> None:
+    """Runs the SQLite profile on every new DBAPI connection of the engine."""
+    pragmas = get_sqlite_pragmas()
+
+    @event.listens_for(sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+def _is_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+def _connect_args(url) -> dict:
+    """Driver-specific connection arguments: timeouts and statement cache."""
+    backend, driver = url.get_backend_name(), url.get_driver_name()
+    if backend == "sqlite":
+        return {"check_same_thread": False, "timeout": settings.DB_CONNECT_TIMEOUT}
+    if backend != "postgresql":
+        return {}
+    if driver == "asyncpg":
+        connect_args = {
+            "timeout": settings.DB_CONNECT_TIMEOUT,
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        }
+        if settings.DB_STATEMENT_TIMEOUT is not None:
+            connect_args["server_settings"] = {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT)}
+        return connect_args
+    # psycopg2 / psycopg (libpq)
+    connect_args = {"connect_timeout": int(settings.DB_CONNECT_TIMEOUT)}
+    if settings.DB_STATEMENT_TIMEOUT is not None:
+        connect_args["options"] = f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT}"
+    return connect_args
+
+def get_engine_kwargs(url: str) -> dict:
+    """Pool sizing, timeouts, echo and statement cache arguments for create_engine / create_async_engine."""
+    url = make_url(url)
+    kwargs = {
+        "echo": settings.DB_ECHO,
+        "query_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    connect_args = _connect_args(url)
+    if connect_args:
+        kwargs["connect_args"] = connect_args
+    if not _is_memory_sqlite(url):
+        kwargs.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+    return kwargs
+
+def create_db_engine(url: str) -> Engine:
+    engine = create_engine(url, **get_engine_kwargs(url))
+    if engine.dialect.name == "sqlite":
+        apply_sqlite_pragmas(engine)
+    return engine
+
+engine = create_db_engine(settings.SQLALCHEMY_DATABASE_URL)
+
+# expire_on_commit=False: rows and objects built by the app stay valid after the commit,
+# without a SELECT per object to reload them
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+# Async drivers used for each sync backend by the async (event loop friendly) DB path
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+def get_async_database_url(url: str) -> str:
+    """Turns a sync database URL (e.g. sqlite:///./transactions.db) into its async driver URL."""
+    url = make_url(url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None or url.get_driver_name() == driver:
+        return url.render_as_string(hide_password=False)
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+def create_async_db_engine(url: str):
+    url = get_async_database_url(url)
+    async_engine = create_async_engine(url, **get_engine_kwargs(url))
+    if async_engine.dialect.name == "sqlite":
+        apply_sqlite_pragmas(async_engine.sync_engine)
+    return async_engine
+
+async_engine = create_async_db_engine(settings.SQLALCHEMY_DATABASE_URL)
+
+# expire_on_commit=False: objects returned by the async CRUD stay readable after the commit
+# without an implicit (and, in async code, forbidden) lazy reload
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+def _add_missing_columns(bind) -> None:
+    """Adds nullable columns introduced in the models after their table was created."""
+    inspector = inspect(bind)
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable or column.primary_key:
+                continue
+            column_type = column.type.compile(dialect=bind.dialect)
+            with bind.begin() as connection:
+                connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+            logger.info(f"Added column {table.name}.{column.name}")
+
+def init_db(bind=engine):
+    """
+    Creates missing tables, columns and indexes. `create_all` only creates indexes together
+    with new tables, so indexes and nullable columns added later to existing tables are
+    created here.
+    """
+    Base.metadata.create_all(bind=bind)
+    _add_missing_columns(bind)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(bind=bind, checkfirst=True)
+            except IntegrityError as exc:
+                # Existing duplicated rows prevent a unique index. The ETL then checks every pair
+                # with a SELECT (the dedup filter refuses to warm), but concurrent writers are no
+                # longer kept from inserting duplicates until the rows are cleaned up
+                logger.warning(f"Could not create index {index.name}: {exc.orig}")
 
 def get_db():
     """
@@ -18,4 +155,21 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    """
+    Async counterpart of get_db, for `async def` endpoints: queries and commits are awaited
+    instead of blocking the event loop.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_session_factory():
+    """
+    FastAPI dependency for responses that outlive the request scope (e.g. streaming), which
+    must open and close their own session while the body is being sent.
+    """
+    return SessionLocal
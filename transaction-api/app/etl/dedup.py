@@ -0,0 +1,122 @@
+# app/etl/dedup.py
+import hashlib
+import logging
+import math
+import threading
+from typing import Iterable, Optional, Tuple
+
+from sqlalchemy import inspect, select
+from sqlalchemy.orm import Session
+from app.models.transaction import Transaction
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter. Membership tests never give false negatives; false
+    positives happen at roughly `error_rate` while fewer than `capacity` keys were added.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: bytes):
+        # Double hashing (Kirsch-Mitzenmacher) over a single 128-bit digest
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, key: bytes) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: bytes) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+UNIQUE_PAIR_INDEX = "ix_transactions_nome_valor"
+
+
+def has_unique_pair_index(db: Session) -> bool:
+    """Whether the unique (nome, valor) index that backs the duplicate rule exists in the database."""
+    indexes = inspect(db.get_bind()).get_indexes(Transaction.__tablename__)
+    return any(index["name"] == UNIQUE_PAIR_INDEX and index["unique"] for index in indexes)
+
+
+class DedupFilter:
+    """
+    In-process pre-filter for the (nome, valor) duplicate rule.
+
+    While it is not warmed every pair "might exist", so callers always run the SELECT.
+    Once warmed, a negative answer means the pair is definitely not in the table as seen
+    by this process; rows inserted by other processes are still caught by the unique
+    (nome, valor) index. Without that index (e.g. existing duplicates kept init_db from
+    creating it) the filter refuses to warm, so the SELECT is never skipped.
+    """
+
+    def __init__(self):
+        self._bloom: Optional[BloomFilter] = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self._bloom is not None
+
+    @staticmethod
+    def _key(nome: str, valor: float) -> bytes:
+        return f"{nome}\x00{valor!r}".encode("utf-8", "surrogatepass")
+
+    def warm(self, db: Session, capacity: int, error_rate: float, batch_size: int = 10_000) -> bool:
+        """
+        Builds a new filter from every (nome, valor) pair in the table and swaps it in.
+        Returns False, leaving the filter off, when the unique (nome, valor) index is missing.
+        """
+        if not has_unique_pair_index(db):
+            logger.warning(
+                f"Dedup filter disabled: unique index {UNIQUE_PAIR_INDEX} is missing, so every "
+                "duplicate check runs a SELECT"
+            )
+            self.reset()
+            return False
+        bloom = BloomFilter(capacity, error_rate)
+        rows = db.execute(
+            select(Transaction.nome, Transaction.valor).execution_options(yield_per=batch_size)
+        )
+        for nome, valor in rows:
+            bloom.add(self._key(nome, valor))
+        with self._lock:
+            self._bloom = bloom
+        logger.info(f"Dedup filter warmed with {bloom.count} transactions ({len(bloom._bits)} bytes)")
+        return True
+
+    def might_exist(self, nome: str, valor: float) -> bool:
+        bloom = self._bloom
+        return bloom is None or self._key(nome, valor) in bloom
+
+    def add_many(self, pairs: Iterable[Tuple[str, float]]) -> None:
+        bloom = self._bloom
+        if bloom is None:
+            return
+        with self._lock:
+            count_before = bloom.count
+            for nome, valor in pairs:
+                bloom.add(self._key(nome, valor))
+        if count_before <= bloom.capacity < bloom.count:
+            logger.warning("Dedup filter is over capacity; its false positive rate is growing")
+
+    def add(self, nome: str, valor: float) -> None:
+        self.add_many([(nome, valor)])
+
+    def reset(self) -> None:
+        with self._lock:
+            self._bloom = None
+
+
+dedup_filter = DedupFilter()
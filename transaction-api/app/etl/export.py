@@ -0,0 +1,217 @@
+# app/etl/export.py
+"""
+Export of the transactions table as gzip-compressed CSV or, when pyarrow is installed,
+as Arrow IPC stream or Parquet.
+
+Rows are read in order of id (of processing date, when filtered by period) through a
+server-side cursor (see iter_db_transaction_batches) and encoded one batch at a time, so a
+full export is a single sequential scan with bounded memory. Each encoder yields the output
+bytes of every batch as soon as it is written, which lets the API stream them and the CLI
+write them to a file.
+
+The columnar formats need pyarrow, an optional dependency listed in requirements-export.txt.
+
+Usage:
+    python -m app.etl.export transacoes.csv.gz
+    python -m app.etl.export transacoes.parquet --mcc 5812 --from 2024-01-01 --to 2024-02-01
+"""
+import argparse
+import csv
+import datetime
+import io
+import logging
+import zlib
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+from sqlalchemy.orm import Session
+from app.crud.transaction import EXPORT_COLUMNS, iter_db_transaction_batches
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("csv", "arrow", "parquet")
+COLUMNS = tuple(column.key for column in EXPORT_COLUMNS)
+MEDIA_TYPES = {
+    "csv": "application/gzip",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+FILE_EXTENSIONS = {"csv": ".csv.gz", "arrow": ".arrow", "parquet": ".parquet"}
+
+
+class ExportFormatUnavailable(RuntimeError):
+    """The requested format needs an optional dependency that is not installed."""
+
+
+def detect_format(path: str) -> str:
+    """Infers the export format from the file extension (gzip CSV for everything else)."""
+    path = path.lower()
+    if path.endswith((".arrow", ".arrows", ".ipc")):
+        return "arrow"
+    if path.endswith(".parquet"):
+        return "parquet"
+    return "csv"
+
+
+def check_format(file_format: str) -> None:
+    if file_format not in FORMATS:
+        raise ValueError(f"Unsupported format '{file_format}'. Use one of: {', '.join(FORMATS)}")
+    if file_format != "csv" and pyarrow is None:
+        raise ExportFormatUnavailable(f"The '{file_format}' export needs pyarrow (pip install pyarrow)")
+
+
+def iter_csv_gzip(batches: Iterable[Sequence[Sequence]]) -> Iterator[bytes]:
+    """Header plus one CSV line per row, gzip-compressed on the fly."""
+    compressor = zlib.compressobj(wbits=31)  # 31 = gzip container
+    text = io.StringIO()
+    writer = csv.writer(text, lineterminator="\n")
+    writer.writerow(COLUMNS)
+    for rows in batches:
+        writer.writerows(
+            [value.isoformat() if isinstance(value, datetime.datetime) else value for value in row] for row in rows
+        )
+        chunk = compressor.compress(text.getvalue().encode("utf-8"))
+        text.seek(0)
+        text.truncate()
+        if chunk:
+            yield chunk
+    yield compressor.compress(text.getvalue().encode("utf-8")) + compressor.flush()
+
+
+def _arrow_schema():
+    types = {
+        "id": pyarrow.int64(),
+        "nome": pyarrow.string(),
+        "mcc": pyarrow.string(),
+        "valor": pyarrow.float64(),
+        "regiao": pyarrow.string(),
+        "data": pyarrow.timestamp("us"),
+    }
+    return pyarrow.schema([(column, types[column]) for column in COLUMNS])
+
+
+def _record_batch(schema, rows: Sequence[Sequence]):
+    columns = zip(*rows)
+    return pyarrow.record_batch(
+        [pyarrow.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema
+    )
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that keeps what was written until `drain` is called."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _iter_arrow_writer(open_writer, write, batches) -> Iterator[bytes]:
+    schema = _arrow_schema()
+    sink = _ChunkSink()
+    writer = open_writer(sink, schema)
+    try:
+        for rows in batches:
+            write(writer, _record_batch(schema, rows))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def iter_arrow_ipc(batches: Iterable[Sequence[Sequence]]) -> Iterator[bytes]:
+    """Arrow IPC stream with one record batch per database batch."""
+    return _iter_arrow_writer(
+        lambda sink, schema: pyarrow.ipc.new_stream(sink, schema),
+        lambda writer, batch: writer.write_batch(batch),
+        batches,
+    )
+
+
+def iter_parquet(batches: Iterable[Sequence[Sequence]]) -> Iterator[bytes]:
+    """Parquet file with one row group per database batch."""
+    return _iter_arrow_writer(
+        lambda sink, schema: pyarrow.parquet.ParquetWriter(sink, schema, compression="zstd"),
+        lambda writer, batch: writer.write_batch(batch),
+        batches,
+    )
+
+
+ENCODERS = {"csv": iter_csv_gzip, "arrow": iter_arrow_ipc, "parquet": iter_parquet}
+
+
+def iter_export(
+    db: Session,
+    file_format: str = "csv",
+    mcc: Optional[str] = None,
+    date_from: Optional[datetime.datetime] = None,
+    date_to: Optional[datetime.datetime] = None,
+    batch_size: int = 10_000,
+) -> Iterator[bytes]:
+    """Yields the export of the (optionally filtered) transactions table, chunk by chunk."""
+    check_format(file_format)
+    batches = iter_db_transaction_batches(db, mcc=mcc, date_from=date_from, date_to=date_to, batch_size=batch_size)
+    return ENCODERS[file_format](batches)
+
+
+def export_to_file(db: Session, path: str, file_format: Optional[str] = None, **filters) -> int:
+    """Writes the export to `path` and returns the number of bytes written."""
+    file_format = file_format or detect_format(path)
+    written = 0
+    with open(path, "wb") as f:
+        for chunk in iter_export(db, file_format, **filters):
+            f.write(chunk)
+            written += len(chunk)
+    return written
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Exportação das transações em CSV (gzip), Arrow IPC ou Parquet.")
+    parser.add_argument("path", help="Arquivo de saída (.csv.gz, .arrow ou .parquet)")
+    parser.add_argument("--format", choices=FORMATS, default=None, help="Formato de saída (padrão: pela extensão)")
+    parser.add_argument("--mcc", default=None, help="Exporta apenas este MCC")
+    parser.add_argument("--from", dest="date_from", type=datetime.datetime.fromisoformat, default=None,
+                        help="Data de processamento inicial (inclusive, ISO 8601)")
+    parser.add_argument("--to", dest="date_to", type=datetime.datetime.fromisoformat, default=None,
+                        help="Data de processamento final (exclusive, ISO 8601)")
+    parser.add_argument("--batch-size", type=int, default=10_000, help="Linhas lidas do cursor por vez")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    from app.db.session import SessionLocal
+
+    with SessionLocal() as db:
+        written = export_to_file(
+            db, args.path, args.format,
+            mcc=args.mcc, date_from=args.date_from, date_to=args.date_to, batch_size=args.batch_size,
+        )
+    logger.info(f"Export finished: {args.path} ({written} bytes)")
+    return written
+
+
+if __name__ == "__main__":
+    main()
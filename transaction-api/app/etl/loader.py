@@ -0,0 +1,209 @@
+# app/etl/loader.py
+"""
+Command-line bulk loader for transaction files.
+
+Streams an NDJSON or CSV file through the batch ETL (validation, dedup and load) in
+fixed-size chunks, without going through the HTTP API. Only one chunk is kept in
+memory at a time, and a checkpoint with the byte offset of the last committed chunk
+allows an interrupted load to resume where it stopped.
+
+Usage:
+    python -m app.etl.loader transacoes.ndjson --chunk-size 5000 --checkpoint transacoes.ckpt
+"""
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass
+from itertools import islice
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Tuple
+
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.etl.processor import process_and_load_transaction_batch, regions_client
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("ndjson", "csv")
+
+
+@dataclass
+class LoadSummary:
+    records: int = 0
+    created: int = 0
+    conflicts: int = 0
+    invalid: int = 0
+
+
+def detect_format(path: str) -> str:
+    """Infers the file format from its extension (.csv or NDJSON for everything else)."""
+    return "csv" if path.lower().endswith(".csv") else "ndjson"
+
+
+def _iter_lines(f: BinaryIO) -> Iterator[Tuple[bytes, int]]:
+    """Yields each line together with the byte offset right after it."""
+    while True:
+        line = f.readline()
+        if not line:
+            return
+        yield line, f.tell()
+
+
+def iter_ndjson_records(f: BinaryIO, offset: int = 0) -> Iterator[Tuple[Any, int]]:
+    """Yields (record, offset after the record) for each non-blank NDJSON line."""
+    f.seek(offset)
+    for line, next_offset in _iter_lines(f):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line.decode("utf-8")), next_offset
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            # Kept as raw text so the batch ETL reports it as an invalid record
+            yield line.decode("utf-8", errors="replace").strip(), next_offset
+
+
+def iter_csv_records(f: BinaryIO, offset: int = 0) -> Iterator[Tuple[Any, int]]:
+    """Yields (record, offset after the record) for each CSV row, keyed by the header."""
+    f.seek(0)
+    header = next(csv.reader([f.readline().decode("utf-8-sig")]), None)
+    if not header:
+        return
+    f.seek(max(offset, f.tell()))
+
+    position = f.tell()
+    undecodable = False
+
+    def decoded_lines():
+        nonlocal position, undecodable
+        for line, next_offset in _iter_lines(f):
+            position = next_offset
+            try:
+                yield line.decode("utf-8")
+            except UnicodeDecodeError:
+                undecodable = True
+                yield line.decode("utf-8", errors="replace")
+
+    for row in csv.reader(decoded_lines()):
+        if undecodable:
+            # A row with bytes that are not UTF-8 goes on as raw text and is reported as invalid
+            undecodable = False
+            yield ",".join(row), position
+            continue
+        if not row:
+            continue
+        yield dict(zip(header, row)), position
+
+
+def read_checkpoint(checkpoint_path: str, source: str) -> Optional[Dict[str, Any]]:
+    """Returns the saved checkpoint for `source`, or None when there is nothing to resume."""
+    try:
+        with open(checkpoint_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return None
+    if state.get("source") != source:
+        raise ValueError(f"Checkpoint '{checkpoint_path}' belongs to another file: {state.get('source')}")
+    return state
+
+
+def write_checkpoint(checkpoint_path: str, state: Dict[str, Any]) -> None:
+    """Atomically replaces the checkpoint file, so a crash never leaves it half written."""
+    tmp_path = f"{checkpoint_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, checkpoint_path)
+
+
+def load_file(
+    db: Session,
+    path: str,
+    file_format: Optional[str] = None,
+    chunk_size: int = settings.TRANSACTION_BATCH_SIZE,
+    checkpoint_path: Optional[str] = None,
+) -> LoadSummary:
+    """
+    Loads every transaction of `path` into the database, one chunk per commit.
+
+    When `checkpoint_path` is given, the load resumes from the offset saved there and the
+    checkpoint is updated after each committed chunk. Re-processing a chunk after a crash
+    is harmless: its records are reported as conflicts by the dedup rule.
+    """
+    file_format = file_format or detect_format(path)
+    if file_format not in FORMATS:
+        raise ValueError(f"Unsupported format '{file_format}'. Use one of: {', '.join(FORMATS)}")
+    iter_records = iter_csv_records if file_format == "csv" else iter_ndjson_records
+
+    source = os.path.abspath(path)
+    summary = LoadSummary()
+    offset = 0
+    if checkpoint_path:
+        state = read_checkpoint(checkpoint_path, source)
+        if state:
+            offset = state["offset"]
+            summary = LoadSummary(**state["summary"])
+            logger.info(f"Resuming {path} from record {summary.records} (byte {offset})")
+
+    with open(path, "rb") as f:
+        records = iter_records(f, offset)
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+
+            results = process_and_load_transaction_batch(
+                db, [record for record, _ in chunk], start_index=summary.records
+            )
+            for result in results:
+                if result.status == "created":
+                    summary.created += 1
+                elif result.status == "conflict":
+                    summary.conflicts += 1
+                else:
+                    summary.invalid += 1
+                    logger.warning(f"Invalid record {result.index}: {result.detail}")
+            summary.records += len(chunk)
+
+            offset = chunk[-1][1]
+            if checkpoint_path:
+                write_checkpoint(checkpoint_path, {"source": source, "offset": offset, "summary": asdict(summary)})
+            logger.info(
+                f"{summary.records} records processed "
+                f"(created={summary.created}, conflicts={summary.conflicts}, invalid={summary.invalid})"
+            )
+
+    return summary
+
+
+def main(argv=None) -> LoadSummary:
+    parser = argparse.ArgumentParser(description="Carga em lote de transações a partir de arquivos NDJSON ou CSV.")
+    parser.add_argument("path", help="Arquivo de transações (NDJSON ou CSV)")
+    parser.add_argument("--format", choices=FORMATS, default=None, help="Formato do arquivo (padrão: pela extensão)")
+    parser.add_argument("--chunk-size", type=int, default=settings.TRANSACTION_BATCH_SIZE,
+                        help="Registros por INSERT/commit")
+    parser.add_argument("--checkpoint", default=None, help="Arquivo de checkpoint para retomar a carga")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    from app.db.session import SessionLocal, init_db
+    from app.etl.dedup import dedup_filter
+    init_db()
+
+    if settings.REGIONS_ENRICHMENT_ENABLED:
+        # Loaded once up front: the region stage of the batch ETL only reads the local copy
+        asyncio.run(regions_client.refresh())
+
+    with SessionLocal() as db:
+        if settings.DEDUP_FILTER_ENABLED:
+            dedup_filter.warm(db, settings.DEDUP_FILTER_CAPACITY, settings.DEDUP_FILTER_ERROR_RATE)
+        summary = load_file(db, args.path, args.format, args.chunk_size, args.checkpoint)
+    logger.info(f"Load finished: {asdict(summary)}")
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+# app/etl/mcc_client.py
+import asyncio
+import json
+import logging
+from typing import Dict, Iterable, Optional
+
+import httpx
+from app.etl.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Status codes that mean "this MCC does not exist", as opposed to a failure worth retrying
+NOT_FOUND_STATUS_CODES = (404, 422)
+
+
+def normalize_mcc(mcc) -> Optional[int]:
+    """Parses a code the way the mcc-api does (as an int), or None when it is not a number."""
+    try:
+        return int(mcc)
+    except (TypeError, ValueError):
+        return None
+
+
+class MccClient:
+    """
+    Cached lookup client for the mcc-api.
+
+    - Found codes are cached for `ttl` seconds and unknown codes for `negative_ttl` seconds;
+      transport errors are never cached.
+    - Concurrent lookups of the same code share a single HTTP request (single-flight).
+    - The cache is bounded to `maxsize` codes, evicting the least recently used.
+
+    - Optionally, the whole MCC table is kept as a local snapshot (see `refresh_snapshot`).
+      While a snapshot is loaded it answers every lookup without any network hop.
+
+    Results keep the shape of the mcc-api response, or `{"error": ...}` on failure.
+    """
+
+    def __init__(
+        self,
+        http_client: httpx.AsyncClient,
+        base_url: str,
+        ttl: float,
+        negative_ttl: float,
+        maxsize: int,
+    ):
+        self.http_client = http_client
+        self.base_url = base_url.rstrip("/")
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._cache = TTLCache(maxsize)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._snapshot: Optional[Dict[int, dict]] = None
+
+    async def lookup(self, mcc) -> dict:
+        code = normalize_mcc(mcc)
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot.get(code) or {"error": "MCC not found in snapshot"}
+
+        # Equivalent spellings ("0742", " 742") share one cache entry and one request
+        key = str(mcc) if code is None else str(code)
+
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        # The fetch runs in its own task, so a caller that is cancelled (e.g. the client
+        # disconnected) only stops waiting: the request goes on for everyone else
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch(key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget_inflight(key, done))
+        return await asyncio.shield(task)
+
+    def _forget_inflight(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    async def _fetch(self, key: str) -> dict:
+        try:
+            response = await self.http_client.get(f"{self.base_url}/mcc/{key}")
+            response.raise_for_status()
+            result = response.json()
+            self._cache.set(key, result, self.ttl)
+            return result
+        except httpx.HTTPStatusError as exc:
+            result = {"error": f"HTTP error {exc.response.status_code}"}
+            if exc.response.status_code in NOT_FOUND_STATUS_CODES:
+                self._cache.set(key, result, self.negative_ttl)
+            return result
+        except httpx.RequestError as exc:
+            return {"error": f"An error occurred during request: {exc}"}
+        except Exception as e:
+            return {"error": f"An unexpected error occurred: {e}"}
+
+    def cache_clear(self) -> None:
+        self._cache.clear()
+
+    @property
+    def snapshot_size(self) -> Optional[int]:
+        snapshot = self._snapshot
+        return None if snapshot is None else len(snapshot)
+
+    def load_snapshot(self, entries: Iterable[dict]) -> None:
+        """Replaces the local MCC table in a single assignment, so lookups never see it half built."""
+        snapshot = {normalize_mcc(entry["code"]): entry for entry in entries}
+        snapshot.pop(None, None)
+        self._snapshot = snapshot
+
+    def clear_snapshot(self) -> None:
+        self._snapshot = None
+
+    async def refresh_snapshot(self, source_file: Optional[str] = None) -> bool:
+        """
+        Reloads the snapshot from `source_file` (an mcc.json file) or, when it is not given,
+        from the mcc-api `GET /mcc` endpoint. On failure the previous snapshot is kept.
+        """
+        try:
+            if source_file:
+                entries = await asyncio.to_thread(_read_json_file, source_file)
+            else:
+                response = await self.http_client.get(f"{self.base_url}/mcc")
+                response.raise_for_status()
+                entries = response.json()
+            self.load_snapshot(entries)
+        except Exception as exc:
+            logger.warning(f"MCC snapshot refresh failed, keeping the previous snapshot: {exc}")
+            return False
+        logger.info(f"MCC snapshot loaded with {self.snapshot_size} entries")
+        return True
+
+    async def run_snapshot_refresher(self, interval: float, source_file: Optional[str] = None) -> None:
+        """Background task that refreshes the snapshot every `interval` seconds."""
+        while True:
+            await asyncio.sleep(interval)
+            await self.refresh_snapshot(source_file)
+
+
+def _read_json_file(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
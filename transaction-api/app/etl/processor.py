@@ -1,16 +1,108 @@
 # app/etl/processor.py
 import datetime
+import json
 import httpx
 import logging
+from typing import Any, Iterable, List, Optional, Tuple
 
 from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.schemas.transaction import TransactionCreate, TransactionResponse
-from app.crud.transaction import get_transaction_by_name_and_value, create_db_transaction
+from app.schemas.transaction import TransactionCreate, TransactionResponse, TransactionBatchItemResult
+from app.crud.transaction import (
+    get_transaction_by_name_and_value,
+    get_transaction_by_name_and_value_async,
+    create_db_transaction,
+    create_db_transaction_async,
+    get_existing_name_value_pairs,
+    create_db_transactions_bulk,
+)
+from app.core.config import settings
+from app.etl.dedup import dedup_filter
+from app.etl.mcc_client import MccClient
+from app.etl.regions_client import RegionsClient
 
-client = httpx.AsyncClient()
+client = httpx.AsyncClient(
+    timeout=httpx.Timeout(settings.MCC_API_TIMEOUT),
+    limits=httpx.Limits(
+        max_connections=settings.MCC_API_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.MCC_API_MAX_KEEPALIVE_CONNECTIONS,
+    ),
+)
+mcc_client = MccClient(
+    client,
+    base_url=settings.MCC_API_URL,
+    ttl=settings.MCC_CACHE_TTL,
+    negative_ttl=settings.MCC_CACHE_NEGATIVE_TTL,
+    maxsize=settings.MCC_CACHE_MAX_SIZE,
+)
+regions_http_client = httpx.AsyncClient(
+    timeout=httpx.Timeout(settings.REGIONS_API_TIMEOUT),
+    limits=httpx.Limits(max_connections=settings.REGIONS_API_MAX_CONNECTIONS),
+)
+regions_client = RegionsClient(
+    regions_http_client,
+    base_url=settings.REGIONS_API_URL,
+    max_age=settings.REGIONS_CACHE_MAX_AGE,
+    retry_interval=settings.REGIONS_RETRY_INTERVAL,
+)
 logger = logging.getLogger(__name__)
 
+DUPLICATE_TRANSACTION_DETAIL = "Uma transação similar já foi registrada."
+
+
+class InvalidRegionError(ValueError):
+    """`regiao` is not in the regions table."""
+
+
+class RegionsUnavailableError(InvalidRegionError):
+    """`regiao` cannot be validated because the regions table was never loaded."""
+
+
+def _record_region(record: Any) -> Optional[Any]:
+    return record.get("regiao") if isinstance(record, dict) else getattr(record, "regiao", None)
+
+async def ensure_regions_loaded(records: Iterable[Any]) -> None:
+    """
+    Called by the async entry points before the ETL runs: makes sure the regions table is
+    available to transform_region when any of the records (models or raw dicts) has a region.
+    """
+    if settings.REGIONS_ENRICHMENT_ENABLED and any(_record_region(record) is not None for record in records):
+        await regions_client.ensure_loaded()
+
+def transform_region(transaction_data: TransactionCreate) -> TransactionCreate:
+    """
+    Region stage of the ETL, shared by every load path: validates `regiao` against the local
+    copy of the regions table and normalizes it to the region code. No network call is made
+    per transaction. Raises InvalidRegionError for unknown regions and RegionsUnavailableError
+    while the table could not be loaded at all, so no region is stored without validation.
+    """
+    if not settings.REGIONS_ENRICHMENT_ENABLED or transaction_data.regiao is None:
+        return transaction_data
+
+    region = regions_client.get(transaction_data.regiao)
+    if region is not None:
+        code = region["code"]
+    elif regions_client.loaded:
+        raise InvalidRegionError(f"Região inválida: {transaction_data.regiao}")
+    else:
+        raise RegionsUnavailableError(f"Tabela de regiões indisponível para validar a região: {transaction_data.regiao}")
+    return transaction_data.model_copy(update={"regiao": code})
+
+def apply_region_stage(transaction_data: TransactionCreate) -> TransactionCreate:
+    """
+    transform_region for the single-transaction paths, where an unknown region is a 400 and an
+    unavailable regions table a 503.
+    """
+    try:
+        return transform_region(transaction_data)
+    except RegionsUnavailableError as exc:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(exc))
+    except InvalidRegionError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
 def process_and_load_transaction(db: Session, transaction_data: TransactionCreate) -> TransactionResponse:
     """
     Simple ETL Process:
@@ -18,34 +110,161 @@ def process_and_load_transaction(db: Session, transaction_data: TransactionCreat
     2. Transform: Data is validated (here, checking for duplicates) and processing date is added.
     3. Load: Transformed data is loaded into the database.
     """
-    # Example of transformation/validation rule: do not allow identical transactions (same name and value)
-    existing_transaction = get_transaction_by_name_and_value(db, nome=transaction_data.nome, valor=transaction_data.valor)
-    if existing_transaction:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="Uma transação similar já foi registrada."
-        )
+    transaction_data = apply_region_stage(transaction_data)
+
+    # Example of transformation/validation rule: do not allow identical transactions (same name and value).
+    # The SELECT is skipped when the dedup filter knows the pair is definitely new.
+    if dedup_filter.might_exist(transaction_data.nome, transaction_data.valor):
+        existing_transaction = get_transaction_by_name_and_value(db, nome=transaction_data.nome, valor=transaction_data.valor)
+        if existing_transaction:
+            raise _duplicate_transaction_error()
 
     # Add processing date (timestamp)
     processing_date = datetime.datetime.now()
 
-    # Load data into the database
-    created_transaction = create_db_transaction(db=db, transaction=transaction_data, processing_date=processing_date)
+    # Load data into the database; the unique (nome, valor) index catches concurrent duplicates
+    try:
+        created_transaction = create_db_transaction(db=db, transaction=transaction_data, processing_date=processing_date)
+    except IntegrityError:
+        db.rollback()
+        raise _duplicate_transaction_error()
+    dedup_filter.add(transaction_data.nome, transaction_data.valor)
     return created_transaction
 
-async def call_mcc_api(mcc):
+async def process_and_load_transaction_async(db: AsyncSession, transaction_data: TransactionCreate) -> TransactionResponse:
+    """Same ETL as process_and_load_transaction, awaiting the database instead of blocking the event loop."""
+    transaction_data = apply_region_stage(transaction_data)
+
+    if dedup_filter.might_exist(transaction_data.nome, transaction_data.valor):
+        existing_transaction = await get_transaction_by_name_and_value_async(
+            db, nome=transaction_data.nome, valor=transaction_data.valor
+        )
+        if existing_transaction:
+            raise _duplicate_transaction_error()
+
+    processing_date = datetime.datetime.now()
+
     try:
-     response = await client.get(f"http://127.0.0.1:8001/mcc/{mcc}")
-     response.raise_for_status()
-     return response.json()
-    except httpx.HTTPStatusError as exc:
-     return {"error": f"HTTP error {exc.response.status_code}"}
-    except httpx.RequestError as exc:
-        return {"error": f"An error occurred during request: {exc}"}
-    except Exception as e:
-        return {"error": f"An unexpected error occurred: {e}"}
-
-async def process_and_create_transaction_with_mcc_request(db: Session, transaction_data: TransactionCreate) -> TransactionResponse:
+        created_transaction = await create_db_transaction_async(
+            db=db, transaction=transaction_data, processing_date=processing_date
+        )
+    except IntegrityError:
+        await db.rollback()
+        raise _duplicate_transaction_error()
+    dedup_filter.add(transaction_data.nome, transaction_data.valor)
+    return created_transaction
+
+def _duplicate_transaction_error() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=DUPLICATE_TRANSACTION_DETAIL
+    )
+
+def extract_batch_records(body: bytes, content_type: str) -> List[Any]:
+    """
+    Extract step of the batch ETL: turns the raw request body into a list of records.
+
+    Accepts either a JSON array or NDJSON (one JSON object per line). A malformed
+    NDJSON line, including one that is not valid UTF-8, is kept as its raw text so it
+    is reported as an invalid item instead of failing the whole batch.
+    """
+    if "ndjson" in content_type:
+        records = []
+        for raw_line in body.splitlines():
+            if not raw_line.strip():
+                continue
+            try:
+                records.append(json.loads(raw_line.decode("utf-8")))
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                records.append(raw_line.decode("utf-8", errors="replace"))
+        return records
+
+    try:
+        records = json.loads(body)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Corpo da requisição não é um JSON válido."
+        )
+    if not isinstance(records, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="O corpo da requisição deve ser uma lista de transações."
+        )
+    return records
+
+def _format_validation_error(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'registro'}: {error['msg']}"
+        for error in exc.errors()
+    )
+
+def process_and_load_transaction_batch(db: Session, records: List[Any], start_index: int = 0) -> List[TransactionBatchItemResult]:
+    """
+    Batch ETL Process:
+    1. Extract: Records come already extracted (see extract_batch_records).
+    2. Transform: Each record is validated, its region goes through transform_region and
+       duplicates are detected with a single query for the whole batch, including repeated
+       records inside the batch itself.
+    3. Load: New transactions are inserted with one multi-row INSERT and a single commit.
+
+    Returns one result per record, in the same order, with `index` offset by `start_index`.
+    """
+    results: List[Optional[TransactionBatchItemResult]] = [None] * len(records)
+
+    candidates: List[Tuple[int, TransactionCreate]] = []
+    for position, record in enumerate(records):
+        try:
+            candidates.append((position, transform_region(TransactionCreate.model_validate(record))))
+        except ValidationError as exc:
+            results[position] = TransactionBatchItemResult(
+                index=start_index + position, status="invalid", detail=_format_validation_error(exc)
+            )
+        except InvalidRegionError as exc:
+            results[position] = TransactionBatchItemResult(
+                index=start_index + position, status="invalid", detail=str(exc)
+            )
+
+    existing_pairs = get_existing_name_value_pairs(
+        db, [(t.nome, t.valor) for _, t in candidates if dedup_filter.might_exist(t.nome, t.valor)]
+    )
+    seen_pairs = set()
+    to_create: List[Tuple[int, TransactionCreate]] = []
+    for position, transaction_data in candidates:
+        pair = (transaction_data.nome, transaction_data.valor)
+        if pair in existing_pairs or pair in seen_pairs:
+            results[position] = TransactionBatchItemResult(
+                index=start_index + position, status="conflict", detail=DUPLICATE_TRANSACTION_DETAIL
+            )
+            continue
+        seen_pairs.add(pair)
+        to_create.append((position, transaction_data))
+
+    processing_date = datetime.datetime.now()
+    created_rows = create_db_transactions_bulk(db, [t for _, t in to_create], processing_date)
+    # (nome, valor) is unique inside to_create, so it maps each returned row back to its record
+    created_by_pair = {(row.nome, row.valor): row for row in created_rows}
+    dedup_filter.add_many(created_by_pair)
+    for position, transaction_data in to_create:
+        row = created_by_pair.get((transaction_data.nome, transaction_data.valor))
+        if row is None:
+            # Inserted concurrently by another request and ignored by the unique index
+            results[position] = TransactionBatchItemResult(
+                index=start_index + position, status="conflict", detail=DUPLICATE_TRANSACTION_DETAIL
+            )
+            continue
+        results[position] = TransactionBatchItemResult(
+            index=start_index + position,
+            status="created",
+            transaction=TransactionResponse.model_validate(row)
+        )
+
+    return results
+
+async def call_mcc_api(mcc):
+    return await mcc_client.lookup(mcc)
+
+async def process_and_create_transaction_with_mcc_request(db: AsyncSession, transaction_data: TransactionCreate) -> TransactionResponse:
     mcc_response = await call_mcc_api(mcc=transaction_data.mcc)
     if "error" in mcc_response:
         logger.warning(f"MCC inválido ou erro na chamada externa: {mcc_response['error']}")
@@ -53,4 +272,6 @@ async def process_and_create_transaction_with_mcc_request(db: Session, transacti
 
     logger.info(f"MCC encontrado com sucesso: {mcc_response}")
 
-    return process_and_load_transaction(db, transaction_data)
+    await ensure_regions_loaded([transaction_data])
+
+    return await process_and_load_transaction_async(db, transaction_data)
@@ -0,0 +1,103 @@
+# app/etl/regions_client.py
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class RegionsClient:
+    """
+    Lookup client for the regions-api, backed by a local copy of the whole regions table.
+
+    - The table is small, so it is fetched in bulk (`GET /regions`) and kept in memory;
+      lookups are answered from that copy and never wait on a per-region request.
+    - Once the copy is older than `max_age` seconds, the next lookup starts a refresh in
+      the background and keeps answering from the current copy.
+    - A failed or slow refresh keeps the previous copy. Only while no copy was ever loaded
+      does a lookup wait for a refresh, and failed attempts are retried after `retry_interval`.
+    - Concurrent refreshes are shared (single-flight).
+    """
+
+    def __init__(
+        self,
+        http_client: httpx.AsyncClient,
+        base_url: str,
+        max_age: float,
+        retry_interval: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.http_client = http_client
+        self.base_url = base_url.rstrip("/")
+        self.max_age = max_age
+        self.retry_interval = retry_interval
+        self._clock = clock
+        self._regions: Optional[Dict[str, dict]] = None
+        self._loaded_at = 0.0
+        self._last_attempt: Optional[float] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._regions is not None
+
+    @staticmethod
+    def normalize_code(code) -> str:
+        return str(code).strip().upper()
+
+    def load(self, entries: Iterable[dict]) -> None:
+        """Replaces the local regions table in a single assignment."""
+        self._regions = {self.normalize_code(entry["code"]): entry for entry in entries if "code" in entry}
+        self._loaded_at = self._clock()
+
+    def clear(self) -> None:
+        self._regions = None
+        self._last_attempt = None
+
+    async def refresh(self) -> bool:
+        """Reloads the table from the regions-api; on failure the previous copy is kept."""
+        self._last_attempt = self._clock()
+        try:
+            response = await self.http_client.get(f"{self.base_url}/regions")
+            response.raise_for_status()
+            self.load(response.json())
+        except Exception as exc:
+            logger.warning(f"Regions refresh failed, keeping the previous table: {exc}")
+            return False
+        logger.info(f"Regions table loaded with {len(self._regions)} entries")
+        return True
+
+    def _start_refresh(self) -> asyncio.Task:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self.refresh())
+        return self._refresh_task
+
+    def _retry_due(self, now: float) -> bool:
+        return self._last_attempt is None or now - self._last_attempt >= self.retry_interval
+
+    async def ensure_loaded(self) -> None:
+        """
+        Waits for the table only while no copy was ever loaded; a stale copy is refreshed in
+        the background. Afterwards `get` answers from whatever copy is available.
+        """
+        now = self._clock()
+        if self._regions is None:
+            if self._retry_due(now):
+                await asyncio.shield(self._start_refresh())
+        elif now - self._loaded_at >= self.max_age and self._retry_due(now):
+            self._start_refresh()
+
+    def get(self, code) -> Optional[dict]:
+        """
+        Returns the region with this code (case-insensitive) from the local copy, without any
+        I/O, or None when it is unknown or when no table is loaded (see `loaded`).
+        """
+        regions = self._regions
+        return None if regions is None else regions.get(self.normalize_code(code))
+
+    async def lookup(self, code) -> Optional[dict]:
+        await self.ensure_loaded()
+        return self.get(code)
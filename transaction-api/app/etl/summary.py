@@ -0,0 +1,48 @@
+# app/etl/summary.py
+"""
+Maintenance of the daily summary used by the analytics endpoints.
+
+The API checks the summary against the transactions table at startup and rebuilds it when
+they diverge. This command runs the same check, or forces a rebuild, without starting the
+API (e.g. after loading transactions by other means).
+
+Usage:
+    python -m app.etl.summary            # rebuilds only when the summary diverges
+    python -m app.etl.summary --check    # only reports; exit status 1 when it diverges
+    python -m app.etl.summary --force    # always rebuilds
+"""
+import argparse
+import logging
+
+from app.crud.analytics import daily_summary_diverges, ensure_daily_summary, rebuild_daily_summary
+
+logger = logging.getLogger(__name__)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Verificação e reconstrução do resumo diário de transações.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--check", action="store_true", help="Apenas verifica se o resumo diverge das transações")
+    mode.add_argument("--force", action="store_true", help="Reconstrói o resumo mesmo que ele esteja em dia")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    from app.db.session import SessionLocal, init_db
+    init_db()
+
+    with SessionLocal() as db:
+        if args.check:
+            diverges = daily_summary_diverges(db)
+            logger.info("Daily summary diverges from the transactions table" if diverges else "Daily summary is up to date")
+            return 1 if diverges else 0
+        if args.force:
+            rebuild_daily_summary(db)
+            logger.info("Daily summary rebuilt")
+        elif not ensure_daily_summary(db):
+            logger.info("Daily summary is up to date")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
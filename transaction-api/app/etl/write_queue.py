@@ -0,0 +1,125 @@
+# app/etl/write_queue.py
+import asyncio
+import logging
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.etl.processor import _duplicate_transaction_error, apply_region_stage, process_and_load_transaction_batch
+from app.schemas.transaction import TransactionCreate, TransactionResponse
+
+logger = logging.getLogger(__name__)
+
+# Queued by stop() to tell the worker to finish its current batch and exit
+_STOP = object()
+
+
+class GroupCommitWriter:
+    """
+    Group commit for single-transaction inserts.
+
+    Concurrent `submit` calls are queued and flushed together through the batch ETL (one
+    duplicate check, one multi-row INSERT and one commit) once `max_batch` transactions are
+    waiting or `max_delay` seconds after the first one was queued. Each caller awaits the
+    result of its own transaction, with the same outcome as the one-by-one ETL: the created
+    transaction, or a 409 for duplicates. The flush runs in a worker thread with its own
+    session, so the event loop is never blocked by the database.
+    """
+
+    def __init__(self, session_factory, max_batch: int, max_delay: float):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None and not self._worker.done()
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stops the worker gracefully: it finishes the flush in progress, flushes whatever is
+        still queued and then exits, so no caller is left waiting.
+        """
+        if self._worker is None:
+            return
+        await self._queue.put(_STOP)
+        await self._worker
+        self._worker = None
+
+    async def submit(self, transaction_data: TransactionCreate) -> TransactionResponse:
+        # Unknown regions are rejected with the same 400 as the one-by-one ETL, before queueing
+        transaction_data = apply_region_stage(transaction_data)
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((transaction_data, future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+        # Submits that arrived after stop() was called are still flushed before exiting
+        while not self._queue.empty():
+            pending = []
+            while not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is not _STOP:
+                    pending.append(item)
+            if pending:
+                await self._flush(pending)
+
+    def _load(self, records: List[TransactionCreate]):
+        with self.session_factory() as db:
+            return process_and_load_transaction_batch(db, records)
+
+    async def _flush(self, batch: List[Tuple[TransactionCreate, asyncio.Future]]) -> None:
+        try:
+            results = await asyncio.to_thread(self._load, [transaction_data for transaction_data, _ in batch])
+        except Exception as exc:
+            logger.exception("Group commit flush failed")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue  # caller went away (e.g. request cancelled)
+            if result.status == "created":
+                future.set_result(result.transaction)
+            elif result.status == "conflict":
+                future.set_exception(_duplicate_transaction_error())
+            else:
+                future.set_exception(HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=result.detail))
+
+
+write_queue = GroupCommitWriter(
+    SessionLocal,
+    max_batch=settings.WRITE_QUEUE_MAX_BATCH,
+    max_delay=settings.WRITE_QUEUE_MAX_DELAY_MS / 1000,
+)
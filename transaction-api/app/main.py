@@ -1,16 +1,56 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.db.base import Base
-from app.db.session import engine
-from app.api.endpoints import transaction
+from app.core.config import settings
+from app.db.session import SessionLocal, init_db
+from app.api.endpoints import analytics, transaction
+from app.crud.analytics import ensure_daily_summary
+from app.etl.dedup import dedup_filter
+from app.etl.processor import mcc_client, regions_client
+from app.etl.write_queue import write_queue
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Create database tables and indexes
+init_db()
+
+@asynccontextmanager
+async def lifespan(app):
+    with SessionLocal() as db:
+        ensure_daily_summary(db)
+
+    if settings.DEDUP_FILTER_ENABLED:
+        with SessionLocal() as db:
+            dedup_filter.warm(db, settings.DEDUP_FILTER_CAPACITY, settings.DEDUP_FILTER_ERROR_RATE)
+
+    snapshot_refresher = None
+    if settings.MCC_SNAPSHOT_ENABLED:
+        await mcc_client.refresh_snapshot(settings.MCC_SNAPSHOT_FILE)
+        snapshot_refresher = asyncio.create_task(
+            mcc_client.run_snapshot_refresher(settings.MCC_SNAPSHOT_REFRESH_INTERVAL, settings.MCC_SNAPSHOT_FILE)
+        )
+
+    # Regions are preloaded in the background; the first enrichment waits for it only if still missing
+    regions_warmup = None
+    if settings.REGIONS_ENRICHMENT_ENABLED:
+        regions_warmup = asyncio.create_task(regions_client.refresh())
+
+    if settings.WRITE_QUEUE_ENABLED:
+        write_queue.start()
+
+    yield
+
+    await write_queue.stop()
+    if snapshot_refresher:
+        snapshot_refresher.cancel()
+    if regions_warmup:
+        regions_warmup.cancel()
 
 app = FastAPI(
     title="API de Transações com ETL",
     description="Uma API simples para registrar e consultar transações financeiras usando um fluxo ETL.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Include all API routers
-app.include_router(transaction.router)
\ No newline at end of file
+app.include_router(transaction.router)
+app.include_router(analytics.router)
@@ -0,0 +1,14 @@
+# app/models/analytics.py
+from sqlalchemy import Column, Date, Float, Integer, String
+from app.db.base import Base
+
+class TransactionDailySummary(Base):
+    """Agregado de transações por MCC e dia de processamento, mantido incrementalmente pelo ETL."""
+    __tablename__ = "transaction_daily_summary"
+
+    mcc = Column(String, primary_key=True)
+    dia = Column(Date, primary_key=True)
+    quantidade = Column(Integer, nullable=False)
+    total = Column(Float, nullable=False)
+    valor_minimo = Column(Float, nullable=False)
+    valor_maximo = Column(Float, nullable=False)
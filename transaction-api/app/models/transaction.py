@@ -1,12 +1,19 @@
 # app/models/transaction.py
-from sqlalchemy import Column, Integer, String, Float, DateTime
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index
 from app.db.base import Base
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Chave da regra de duplicidade do ETL: uma única busca no índice por (nome, valor)
+        Index("ix_transactions_nome_valor", "nome", "valor", unique=True),
+        # Consultas por período, de todas as transações ou de um MCC, viram buscas por intervalo no índice
+        Index("ix_transactions_mcc_data", "mcc", "data"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     nome = Column(String, index=True)
     mcc = Column(String, index=True)  # Merchant Category Code
     valor = Column(Float)
-    data = Column(DateTime)
\ No newline at end of file
+    data = Column(DateTime, index=True)
+    regiao = Column(String, nullable=True)  # Sigla da região (regions-api), quando informada
@@ -0,0 +1,18 @@
+# app/schemas/analytics.py
+import datetime
+from pydantic import BaseModel, Field, ConfigDict
+
+class SpendSummary(BaseModel):
+    quantidade: int = Field(..., description="Quantidade de transações")
+    total: float = Field(..., description="Soma dos valores")
+    media: float = Field(..., description="Valor médio")
+    valor_minimo: float = Field(..., description="Menor valor")
+    valor_maximo: float = Field(..., description="Maior valor")
+
+    model_config = ConfigDict(from_attributes=True)
+
+class MccSpendSummary(SpendSummary):
+    mcc: str = Field(..., description="Código MCC")
+
+class DailySpendSummary(SpendSummary):
+    dia: datetime.date = Field(..., description="Dia de processamento das transações")
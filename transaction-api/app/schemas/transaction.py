@@ -1,11 +1,13 @@
 # app/schemas/transaction.py
 import datetime
+from typing import List, Literal, Optional
 from pydantic import BaseModel, Field, ConfigDict
 
 class TransactionBase(BaseModel):
     nome: str = Field(..., description="Nome da transação")
     mcc: str = Field(..., description="Código MCC")
     valor: float = Field(..., gt=0, description="Valor da transação")
+    regiao: Optional[str] = Field(None, description="Sigla da região da transação (ex.: CA)")
 
     model_config = ConfigDict(
         json_schema_extra={
@@ -26,4 +28,17 @@ class TransactionResponse(TransactionBase):
     id: int
     data: datetime.datetime
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class TransactionBatchItemResult(BaseModel):
+    index: int = Field(..., description="Posição do registro no lote enviado")
+    status: Literal["created", "conflict", "invalid"] = Field(..., description="Resultado do processamento do registro")
+    transaction: Optional[TransactionResponse] = Field(None, description="Transação criada, quando status for 'created'")
+    detail: Optional[str] = Field(None, description="Motivo do conflito ou da invalidação")
+
+
+class TransactionBatchResponse(BaseModel):
+    created: int = Field(..., description="Quantidade de transações criadas")
+    conflicts: int = Field(..., description="Quantidade de transações duplicadas")
+    invalid: int = Field(..., description="Quantidade de registros inválidos")
+    results: List[TransactionBatchItemResult]
@@ -1,18 +1,31 @@
 # transaction-api/tests/conftest.py
 
+import asyncio
 import os
+import tempfile
+import httpx
 import pytest
+import pytest_asyncio
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from unittest.mock import patch, AsyncMock
 
+# Banco padrão da aplicação (SessionLocal, init_db na importação de app.main) num diretório
+# temporário, definido antes de importar `app`: os testes nunca alteram o transactions.db versionado
+_APP_DB_DIR = tempfile.TemporaryDirectory()
+os.environ["SQLALCHEMY_DATABASE_URL"] = f"sqlite:///{os.path.join(_APP_DB_DIR.name, 'transactions.db')}"
+
 # 1. IMPORTAÇÃO ABSOLUTA (A FORMA CORRETA)
 # Isso diz ao Python para procurar o pacote 'app' a partir da raiz do projeto.
 from app.main import app
-from app.db.session import get_db
+from app.db.session import get_async_db, get_db, get_session_factory
 from app.db.base import Base
 from app.crud import transaction
+from app.models.analytics import TransactionDailySummary
+from app.etl import processor
 
 # --- Configuração do Banco de Dados de Teste ---
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -24,7 +37,12 @@ if os.path.exists("test.db"):
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+# Mesmo banco pelo driver assíncrono. NullPool: cada teste roda em seu próprio event loop,
+# e conexões aiosqlite não podem ser reaproveitadas entre loops
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
 # --- Criação das Tabelas ---
 # Garante que todas as tabelas sejam criadas no banco de memória antes dos testes.
@@ -43,8 +61,40 @@ def override_get_db():
     finally:
         database.close()
 
+async def override_get_async_db():
+    """Substitui a dependência get_async_db para usar o banco de dados de teste."""
+    async with TestingAsyncSessionLocal() as database:
+        yield database
+
 # Aplica a substituição na instância do app do FastAPI
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
+app.dependency_overrides[get_session_factory] = lambda: TestingSessionLocal
+
+
+# --- Dublê das APIs externas (mcc-api, regions-api) ---
+class FakeHttpClient:
+    """
+    Simula o httpx.AsyncClient. `responses` mapeia o último segmento da URL para o resultado:
+    um corpo JSON, um status HTTP (int) ou uma exceção a ser lançada; pode ser alterado durante
+    o teste. Todas as URLs chamadas ficam em `calls`.
+    """
+
+    def __init__(self, responses, delay=0):
+        self.responses = responses
+        self.delay = delay
+        self.calls = []
+
+    async def get(self, url):
+        self.calls.append(url)
+        await asyncio.sleep(self.delay)
+        outcome = self.responses[url.rsplit("/", 1)[-1]]
+        if isinstance(outcome, Exception):
+            raise outcome
+        request = httpx.Request("GET", url)
+        if isinstance(outcome, int):
+            return httpx.Response(outcome, request=request)
+        return httpx.Response(200, json=outcome, request=request)
 
 
 # --- Fixture do Cliente de Teste ---
@@ -67,8 +117,26 @@ def db_session():
         db.close()
 
 
+@pytest.fixture
+def session_factory():
+    return TestingSessionLocal
+
+
+@pytest_asyncio.fixture
+async def async_db_session():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
 @pytest.fixture(autouse=True)
 def clean_transactions_table(db_session):
-    """Limpa a tabela de transações antes de cada teste unitário."""
+    """Limpa as tabelas de transações e do resumo diário antes de cada teste."""
     db_session.query(transaction.Transaction).delete()
-    db_session.commit()
\ No newline at end of file
+    db_session.query(TransactionDailySummary).delete()
+    db_session.commit()
+
+
+@pytest.fixture(autouse=True)
+def clear_mcc_cache():
+    """Evita que respostas da mcc-api em cache vazem de um teste para outro."""
+    processor.mcc_client.cache_clear()
@@ -1,3 +1,4 @@
+import json
 import pytest
 from faker import Faker
 from unittest.mock import AsyncMock, patch
@@ -42,4 +43,188 @@ def test_post_transaction_with_mcc(mock_call_mcc, client):
     }
 
     response = client.post("/transacoes/with-mcc", json=payload)
-    assert response.status_code == 201
\ No newline at end of file
+    assert response.status_code == 201
+
+
+@patch("app.etl.processor.call_mcc_api", new_callable=AsyncMock)
+def test_post_transaction_with_mcc_duplicate(mock_call_mcc, client):
+    mock_call_mcc.return_value = {"valid": True}
+    payload = {"nome": fake.company(), "mcc": "5678", "valor": 42.0}
+
+    assert client.post("/transacoes/with-mcc", json=payload).status_code == 201
+    # A mesma transação também é barrada pelo caminho assíncrono do banco
+    assert client.post("/transacoes/with-mcc", json=payload).status_code == 409
+
+def test_post_transactions_batch(client):
+    nome = fake.company()
+    payload = [
+        {"nome": nome, "mcc": "5812", "valor": 10.5},
+        {"nome": nome, "mcc": "5812", "valor": 10.5},
+        {"nome": nome, "mcc": "5812", "valor": -1},
+        {"nome": fake.company(), "mcc": "5411", "valor": 20.0},
+    ]
+    response = client.post("/transacoes/batch", json=payload)
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["created"], data["conflicts"], data["invalid"]) == (2, 1, 1)
+    assert [result["status"] for result in data["results"]] == ["created", "conflict", "invalid", "created"]
+    assert data["results"][0]["transaction"]["nome"] == nome
+
+
+def test_post_transactions_batch_ndjson(client):
+    body = "\n".join([
+        '{"nome": "Loja NDJSON", "mcc": "5812", "valor": 15.0}',
+        "isto nao e json",
+        "",
+        '{"nome": "Loja NDJSON", "mcc": "5812", "valor": 16.0}',
+    ])
+    response = client.post(
+        "/transacoes/batch", content=body, headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    assert [result["status"] for result in response.json()["results"]] == ["created", "invalid", "created"]
+
+
+def test_post_transactions_batch_ndjson_invalid_utf8(client):
+    body = b'{"nome": "Loja \xff", "mcc": "5812", "valor": 15.0}\n{"nome": "Loja UTF-8", "mcc": "5812", "valor": 17.0}'
+    response = client.post(
+        "/transacoes/batch", content=body, headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    assert [result["status"] for result in response.json()["results"]] == ["invalid", "created"]
+
+
+def test_post_transactions_batch_requires_list(client):
+    response = client.post("/transacoes/batch", json={"nome": "Loja", "mcc": "5812", "valor": 1.0})
+    assert response.status_code == 400
+
+
+def test_get_transactions_with_cursor_pagination(client):
+    payload = [{"nome": f"Cursor {i}", "mcc": "4321", "valor": 1.0 + i} for i in range(5)]
+    client.post("/transacoes/batch", json=payload)
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/transacoes/", params=params)
+        assert response.status_code == 200
+        seen.extend(t["nome"] for t in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert seen == [f"Cursor {i}" for i in range(5)]
+
+
+def test_get_transactions_with_invalid_cursor(client):
+    response = client.get("/transacoes/", params={"cursor": "nao-e-um-cursor"})
+    assert response.status_code == 400
+
+
+def test_get_transactions_by_mcc_paginated(client):
+    payload = [{"nome": f"Pagina {i}", "mcc": "5812", "valor": 1.0 + i} for i in range(3)]
+    client.post("/transacoes/batch", json=payload)
+
+    first = client.get("/transacoes/mcc", params={"mcc": "5812", "limit": 2})
+    assert [t["nome"] for t in first.json()] == ["Pagina 0", "Pagina 1"]
+
+    second = client.get(
+        "/transacoes/mcc", params={"mcc": "5812", "limit": 2, "cursor": first.headers["X-Next-Cursor"]}
+    )
+    assert [t["nome"] for t in second.json()] == ["Pagina 2"]
+    assert "X-Next-Cursor" not in second.headers
+
+
+def test_get_transactions_by_mcc_stream(client):
+    payload = [{"nome": f"Stream {i}", "mcc": "5999", "valor": 1.0 + i} for i in range(3)]
+    payload.append({"nome": "Outro MCC", "mcc": "1111", "valor": 1.0})
+    client.post("/transacoes/batch", json=payload)
+
+    response = client.get("/transacoes/mcc", params={"mcc": "5999", "stream": True})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["nome"] for line in lines] == [f"Stream {i}" for i in range(3)]
+    assert lines == client.get("/transacoes/mcc", params={"mcc": "5999"}).json()
+
+
+def test_analytics_by_mcc_and_day(client):
+    client.post("/transacoes/batch", json=[
+        {"nome": "Analytics A", "mcc": "7011", "valor": 100.0},
+        {"nome": "Analytics B", "mcc": "7011", "valor": 50.0},
+        {"nome": "Analytics C", "mcc": "7012", "valor": 10.0},
+    ])
+
+    response = client.get("/transacoes/analytics/mcc", params={"mcc": "7011"})
+    assert response.status_code == 200
+    assert response.json() == [
+        {"mcc": "7011", "quantidade": 2, "total": 150.0, "media": 75.0, "valor_minimo": 50.0, "valor_maximo": 100.0}
+    ]
+
+    response = client.get("/transacoes/analytics/diario")
+    assert response.status_code == 200
+    days = response.json()
+    assert len(days) == 1 and days[0]["quantidade"] == 3
+
+
+def test_get_transactions_by_date_range(client):
+    mcc = "6011"
+    client.post("/transacoes/", json={"nome": fake.company(), "mcc": mcc, "valor": 12.0})
+
+    response = client.get("/transacoes/", params={"from": "2000-01-01T00:00:00", "limit": 1000})
+    assert response.status_code == 200
+    assert any(item["mcc"] == mcc for item in response.json())
+
+    response = client.get("/transacoes/mcc", params={"mcc": mcc, "to": "2000-01-01T00:00:00"})
+    assert response.json() == []
+
+    response = client.get("/transacoes/mcc", params={"mcc": mcc, "from": "2000-01-01T00:00:00", "stream": "true"})
+    assert len(response.text.splitlines()) == 1
+
+    assert client.get("/transacoes/", params={"from": "ontem"}).status_code == 422
+
+
+def test_get_transactions_by_date_range_with_cursor(client):
+    payload = [{"nome": f"Periodo {i}", "mcc": "6012", "valor": 1.0 + i} for i in range(5)]
+    client.post("/transacoes/batch", json=payload)
+
+    # `from` com fuso é convertido para UTC sem fuso, como a `data` do cursor
+    for date_from in ("2000-01-01T00:00:00", "2000-01-01T00:00:00Z", "2000-01-01T03:00:00+03:00"):
+        for path, extra in (("/transacoes/", {}), ("/transacoes/mcc", {"mcc": "6012"})):
+            seen, cursor = [], None
+            while True:
+                params = {"from": date_from, "limit": 2, **extra, **({"cursor": cursor} if cursor else {})}
+                response = client.get(path, params=params)
+                assert response.status_code == 200
+                seen.extend(t["nome"] for t in response.json())
+                cursor = response.headers.get("X-Next-Cursor")
+                if not cursor:
+                    break
+            assert seen == [f"Periodo {i}" for i in range(5)]
+
+    # Um cursor da listagem por id não serve para a listagem por período
+    id_cursor = client.get("/transacoes/", params={"limit": 1}).headers["X-Next-Cursor"]
+    response = client.get("/transacoes/", params={"from": "2000-01-01T00:00:00", "cursor": id_cursor})
+    assert response.status_code == 400
+
+
+def test_export_transactions_csv(client):
+    import gzip
+    mcc = "4121"
+    client.post("/transacoes/", json={"nome": fake.company(), "mcc": mcc, "valor": 33.0})
+
+    response = client.get("/transacoes/export", params={"format": "csv", "mcc": mcc})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/gzip"
+    assert "transacoes.csv.gz" in response.headers["content-disposition"]
+    lines = gzip.decompress(response.content).decode("utf-8").splitlines()
+    assert lines[0] == "id,nome,mcc,valor,data,regiao"
+    assert len(lines) == 2
+
+    assert client.get("/transacoes/export", params={"format": "xml"}).status_code == 422
+
+
+def test_export_columnar_needs_pyarrow(client, monkeypatch):
+    from app.etl import export
+    monkeypatch.setattr(export, "pyarrow", None)
+    assert client.get("/transacoes/export", params={"format": "parquet"}).status_code == 501
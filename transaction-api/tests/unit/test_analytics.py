@@ -0,0 +1,114 @@
+import datetime
+
+import pytest
+
+from app.crud import analytics, transaction
+from app.etl import summary
+from app.models.analytics import TransactionDailySummary
+from app.models.transaction import Transaction
+from app.schemas.transaction import TransactionCreate
+
+DIA_1 = datetime.datetime(2024, 3, 1, 10, 0)
+DIA_2 = datetime.datetime(2024, 3, 2, 9, 30)
+
+
+def _summary(db_session):
+    return sorted(
+        (row.mcc, row.dia, row.quantidade, row.total, row.valor_minimo, row.valor_maximo)
+        for row in db_session.query(TransactionDailySummary)
+    )
+
+
+def test_summary_is_updated_by_every_load_path(db_session):
+    transaction.create_db_transaction(db_session, TransactionCreate(nome="A", mcc="5812", valor=10.0), DIA_1)
+    transaction.create_db_transactions_bulk(db_session, [
+        TransactionCreate(nome="B", mcc="5812", valor=30.0),
+        TransactionCreate(nome="C", mcc="5411", valor=5.0),
+    ], DIA_1)
+    transaction.create_db_transactions_bulk(db_session, [TransactionCreate(nome="D", mcc="5812", valor=4.0)], DIA_2)
+
+    incremental = _summary(db_session)
+    assert incremental == [
+        ("5411", DIA_1.date(), 1, 5.0, 5.0, 5.0),
+        ("5812", DIA_1.date(), 2, 40.0, 10.0, 30.0),
+        ("5812", DIA_2.date(), 1, 4.0, 4.0, 4.0),
+    ]
+
+    # O resumo incremental é igual ao recalculado do zero
+    analytics.rebuild_daily_summary(db_session)
+    assert _summary(db_session) == incremental
+
+
+def test_summary_without_upsert_support_is_merged_row_by_row(db_session, monkeypatch):
+    # Banco sem INSERT ... ON CONFLICT: cai no SELECT ... FOR UPDATE + UPDATE/INSERT
+    monkeypatch.setattr(analytics, "UPSERT_DIALECTS", {})
+    transaction.create_db_transaction(db_session, TransactionCreate(nome="A", mcc="5812", valor=10.0), DIA_1)
+    transaction.create_db_transactions_bulk(db_session, [
+        TransactionCreate(nome="B", mcc="5812", valor=30.0),
+        TransactionCreate(nome="C", mcc="5812", valor=2.0),
+    ], DIA_1)
+
+    assert _summary(db_session) == [("5812", DIA_1.date(), 3, 42.0, 2.0, 30.0)]
+
+
+@pytest.mark.asyncio
+async def test_summary_without_upsert_support_async(db_session, async_db_session, monkeypatch):
+    monkeypatch.setattr(analytics, "UPSERT_DIALECTS", {})
+    for nome, valor in (("A", 10.0), ("B", 4.0)):
+        await transaction.create_db_transaction_async(
+            async_db_session, TransactionCreate(nome=nome, mcc="5812", valor=valor), DIA_2
+        )
+
+    assert _summary(db_session) == [("5812", DIA_2.date(), 2, 14.0, 4.0, 10.0)]
+
+
+def test_summary_queries_group_and_filter(db_session):
+    transaction.create_db_transactions_bulk(db_session, [
+        TransactionCreate(nome="A", mcc="5812", valor=10.0),
+        TransactionCreate(nome="B", mcc="5411", valor=5.0),
+    ], DIA_1)
+    transaction.create_db_transactions_bulk(db_session, [TransactionCreate(nome="C", mcc="5812", valor=20.0)], DIA_2)
+
+    by_mcc = analytics.get_summary_by_mcc(db_session)
+    assert [(row.mcc, row.quantidade, row.total, row.media) for row in by_mcc] == [
+        ("5411", 1, 5.0, 5.0), ("5812", 2, 30.0, 15.0)
+    ]
+
+    by_day = analytics.get_summary_by_day(db_session, mcc="5812", date_from=DIA_2.date())
+    assert [(row.dia, row.quantidade, row.valor_maximo) for row in by_day] == [(DIA_2.date(), 1, 20.0)]
+
+    # `to` é exclusivo, como nos endpoints de transações
+    by_day = analytics.get_summary_by_day(db_session, date_from=DIA_1.date(), date_to=DIA_2.date())
+    assert [row.dia for row in by_day] == [DIA_1.date()]
+
+
+def test_ensure_daily_summary_rebuilds_only_when_it_diverges(db_session):
+    transaction.create_db_transaction(db_session, TransactionCreate(nome="A", mcc="5812", valor=10.0), DIA_1)
+    assert analytics.ensure_daily_summary(db_session) is False
+
+    db_session.query(TransactionDailySummary).delete()
+    db_session.commit()
+    assert analytics.ensure_daily_summary(db_session) is True
+    assert _summary(db_session) == [("5812", DIA_1.date(), 1, 10.0, 10.0, 10.0)]
+
+    # Inserção que não passou pelo resumo (ex.: o main.py da raiz ou uma carga manual)
+    db_session.add(Transaction(nome="B", mcc="5812", valor=5.0, data=DIA_1))
+    db_session.commit()
+    assert analytics.daily_summary_diverges(db_session)
+    assert analytics.ensure_daily_summary(db_session) is True
+    assert _summary(db_session) == [("5812", DIA_1.date(), 2, 15.0, 5.0, 10.0)]
+    assert not analytics.daily_summary_diverges(db_session)
+
+
+def test_summary_command_checks_and_rebuilds(db_session, session_factory, monkeypatch):
+    monkeypatch.setattr("app.db.session.SessionLocal", session_factory)
+    monkeypatch.setattr("app.db.session.init_db", lambda: None)
+    transaction.create_db_transaction(db_session, TransactionCreate(nome="A", mcc="5812", valor=10.0), DIA_1)
+    assert summary.main(["--check"]) == 0
+
+    db_session.add(Transaction(nome="B", mcc="5411", valor=5.0, data=DIA_2))
+    db_session.commit()
+    assert summary.main(["--check"]) == 1
+    assert summary.main([]) == 0
+    assert summary.main(["--check"]) == 0
+    assert ("5411", DIA_2.date(), 1, 5.0, 5.0, 5.0) in _summary(db_session)
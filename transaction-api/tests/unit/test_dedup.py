@@ -0,0 +1,90 @@
+import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app.crud import transaction
+from app.db.base import Base
+from app.etl import processor
+from app.etl.dedup import UNIQUE_PAIR_INDEX, BloomFilter, DedupFilter, has_unique_pair_index
+from app.schemas.transaction import TransactionCreate
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    keys = [f"loja-{i}".encode() for i in range(1000)]
+    for key in keys:
+        bloom.add(key)
+
+    assert all(key in bloom for key in keys)
+    false_positives = sum(f"outra-{i}".encode() in bloom for i in range(1000))
+    assert false_positives < 50
+
+
+def test_dedup_filter_is_permissive_until_warmed(db_session):
+    dedup = DedupFilter()
+    assert dedup.might_exist("Loja", 10.0)
+
+    transaction.create_db_transaction(db_session, TransactionCreate(nome="Loja", mcc="1234", valor=10.0),
+                                      datetime.datetime.now())
+    dedup.warm(db_session, capacity=100, error_rate=0.001)
+
+    assert dedup.ready
+    assert dedup.might_exist("Loja", 10.0)
+    assert not dedup.might_exist("Loja", 11.0)
+    dedup.add("Loja", 11.0)
+    assert dedup.might_exist("Loja", 11.0)
+
+
+def test_dedup_filter_stays_off_without_unique_index(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'sem_indice.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP INDEX {UNIQUE_PAIR_INDEX}"))
+
+    dedup = DedupFilter()
+    with Session(engine) as db:
+        assert not has_unique_pair_index(db)
+        assert dedup.warm(db, capacity=100, error_rate=0.001) is False
+
+    # Sem o índice único, toda verificação de duplicidade passa pelo SELECT
+    assert not dedup.ready
+    assert dedup.might_exist("Loja", 10.0)
+    engine.dispose()
+
+
+@pytest.fixture
+def warm_filter():
+    dedup = DedupFilter()
+    with patch('app.etl.dedup.has_unique_pair_index', return_value=True):
+        dedup.warm(MagicMock(execute=MagicMock(return_value=[])), capacity=100, error_rate=0.001)
+    with patch('app.etl.processor.dedup_filter', dedup):
+        yield dedup
+
+
+def test_process_and_load_transaction_skips_select_for_new_pairs(warm_filter):
+    transaction_data = TransactionCreate(nome="Nova", mcc="1234", valor=10.0)
+
+    with patch('app.etl.processor.get_transaction_by_name_and_value') as mock_get, \
+            patch('app.etl.processor.create_db_transaction', return_value="created") as mock_create:
+        result = processor.process_and_load_transaction(MagicMock(), transaction_data)
+
+    mock_get.assert_not_called()
+    mock_create.assert_called_once()
+    assert result == "created"
+    assert warm_filter.might_exist("Nova", 10.0)
+
+
+def test_unique_index_rejects_duplicate_missed_by_filter(db_session, warm_filter):
+    transaction_data = TransactionCreate(nome="Concorrente", mcc="1234", valor=10.0)
+    # Simula uma inserção feita por outro processo, que o filtro local não conhece
+    transaction.create_db_transaction(db_session, transaction_data, datetime.datetime.now())
+
+    with pytest.raises(processor.HTTPException) as exc_info:
+        processor.process_and_load_transaction(db_session, transaction_data)
+    assert exc_info.value.status_code == 409
+
+    results = processor.process_and_load_transaction_batch(db_session, [transaction_data.model_dump()])
+    assert results[0].status == "conflict"
@@ -0,0 +1,64 @@
+import csv
+import datetime
+import gzip
+import io
+
+import pytest
+
+from app.crud import transaction
+from app.etl import export
+from app.schemas.transaction import TransactionCreate
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # opcional: requirements-export.txt
+    pyarrow = None
+
+needs_pyarrow = pytest.mark.skipif(pyarrow is None, reason="pyarrow não instalado")
+
+
+@pytest.fixture
+def seeded(db_session):
+    for i in range(5):
+        transaction.create_db_transaction(
+            db_session,
+            TransactionCreate(nome=f"Loja {i}", mcc="5812" if i % 2 else "5411", valor=10.0 + i),
+            datetime.datetime(2024, 1, 1 + i, 12, 0),
+        )
+    return db_session
+
+
+def test_csv_export_is_gzip_and_filtered(seeded):
+    body = b"".join(export.iter_export(seeded, "csv", mcc="5812", batch_size=1))
+
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(body).decode("utf-8"))))
+    assert [row["nome"] for row in rows] == ["Loja 1", "Loja 3"]
+    assert rows[0]["data"] == "2024-01-02T12:00:00"
+    assert rows[0]["regiao"] == ""
+
+
+@needs_pyarrow
+@pytest.mark.parametrize("file_format", ["arrow", "parquet"])
+def test_columnar_exports_round_trip(seeded, file_format):
+    body = b"".join(export.iter_export(
+        seeded, file_format, date_from=datetime.datetime(2024, 1, 2), date_to=datetime.datetime(2024, 1, 5), batch_size=2
+    ))
+
+    if file_format == "arrow":
+        table = pyarrow.ipc.open_stream(body).read_all()
+    else:
+        table = pyarrow.parquet.read_table(io.BytesIO(body))
+    assert table.column_names == ["id", "nome", "mcc", "valor", "data", "regiao"]
+    assert table.column("nome").to_pylist() == ["Loja 1", "Loja 2", "Loja 3"]
+    assert table.column("data").to_pylist()[0] == datetime.datetime(2024, 1, 2, 12, 0)
+
+
+@needs_pyarrow
+def test_export_to_file_infers_format_from_extension(seeded, tmp_path):
+    target = tmp_path / "transacoes.parquet"
+    written = export.export_to_file(seeded, str(target))
+
+    assert written == target.stat().st_size
+    assert pyarrow.parquet.read_table(target).num_rows == 5
@@ -0,0 +1,68 @@
+import json
+
+from app.crud import transaction
+from app.etl import loader
+
+
+def write_ndjson(path, records):
+    path.write_text("\n".join(json.dumps(record) for record in records) + "\n", encoding="utf-8")
+
+
+def test_load_ndjson_file_in_chunks(db_session, tmp_path):
+    source = tmp_path / "transacoes.ndjson"
+    write_ndjson(source, [
+        {"nome": "Loja A", "mcc": "5812", "valor": 10.0},
+        {"nome": "Loja B", "mcc": "5812", "valor": 20.0},
+        {"nome": "Loja A", "mcc": "5812", "valor": 10.0},
+        {"nome": "Loja C", "mcc": "5812", "valor": -5},
+        {"nome": "Loja D", "mcc": "5411", "valor": 30.0},
+    ])
+
+    summary = loader.load_file(db_session, str(source), chunk_size=2)
+
+    assert summary == loader.LoadSummary(records=5, created=3, conflicts=1, invalid=1)
+    assert len(transaction.get_db_transactions(db_session)) == 3
+
+
+def test_load_csv_file(db_session, tmp_path):
+    source = tmp_path / "transacoes.csv"
+    source.write_text("nome,mcc,valor\nLoja A,5812,10.5\n\"Loja, B\",5411,20\n", encoding="utf-8")
+
+    summary = loader.load_file(db_session, str(source))
+
+    assert summary.created == 2
+    assert {t.nome for t in transaction.get_db_transactions(db_session)} == {"Loja A", "Loja, B"}
+
+
+def test_load_reports_undecodable_lines_as_invalid(db_session, tmp_path):
+    source = tmp_path / "transacoes.ndjson"
+    source.write_bytes(
+        b'{"nome": "Loja A", "mcc": "5812", "valor": 10.0}\n'
+        b'{"nome": "Loja \xff", "mcc": "5812", "valor": 20.0}\n'
+        b'{"nome": "Loja C", "mcc": "5812", "valor": 30.0}\n'
+    )
+    assert loader.load_file(db_session, str(source)) == loader.LoadSummary(records=3, created=2, conflicts=0, invalid=1)
+
+    csv_source = tmp_path / "transacoes.csv"
+    csv_source.write_bytes(b"nome,mcc,valor\nLoja \xff,5812,40\nLoja E,5812,50\n")
+    summary = loader.load_file(db_session, str(csv_source))
+    assert summary == loader.LoadSummary(records=2, created=1, conflicts=0, invalid=1)
+    assert {t.nome for t in transaction.get_db_transactions(db_session)} == {"Loja A", "Loja C", "Loja E"}
+
+
+def test_load_resumes_from_checkpoint(db_session, tmp_path):
+    source = tmp_path / "transacoes.ndjson"
+    checkpoint = tmp_path / "transacoes.ckpt"
+    records = [{"nome": f"Loja {i}", "mcc": "5812", "valor": 10.0 + i} for i in range(4)]
+    write_ndjson(source, records[:2])
+
+    first = loader.load_file(db_session, str(source), chunk_size=1, checkpoint_path=str(checkpoint))
+    assert first.created == 2
+
+    # O arquivo cresce; a nova execução continua a partir do último chunk confirmado
+    write_ndjson(source, records)
+    second = loader.load_file(db_session, str(source), chunk_size=1, checkpoint_path=str(checkpoint))
+
+    assert second == loader.LoadSummary(records=4, created=4, conflicts=0, invalid=0)
+    assert json.loads(checkpoint.read_text())["offset"] == source.stat().st_size
+    assert len(transaction.get_db_transactions(db_session)) == 4
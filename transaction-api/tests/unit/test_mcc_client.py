@@ -0,0 +1,124 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.etl.cache import TTLCache
+from app.etl.mcc_client import MccClient
+from tests.conftest import FakeHttpClient
+
+
+def make_client(responses, delay=0):
+    http_client = FakeHttpClient(responses, delay)
+    return MccClient(http_client, base_url="http://mcc", ttl=60, negative_ttl=10, maxsize=2), http_client
+
+
+def test_ttl_cache_expires_and_evicts_lru():
+    now = [0.0]
+    cache = TTLCache(maxsize=2, clock=lambda: now[0])
+    cache.set("a", 1, ttl=10)
+    cache.set("b", 2, ttl=10)
+    assert cache.get("a") == 1  # "a" passa a ser o mais recente
+    cache.set("c", 3, ttl=10)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+    now[0] = 11
+    assert cache.get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_lookup_caches_found_codes():
+    mcc_client, http_client = make_client({"5812": {"code": 5812, "description": "Restaurants"}})
+
+    first = await mcc_client.lookup("5812")
+    second = await mcc_client.lookup(5812)
+
+    assert first == second == {"code": 5812, "description": "Restaurants"}
+    assert http_client.calls == ["http://mcc/mcc/5812"]
+
+
+@pytest.mark.asyncio
+async def test_lookup_caches_unknown_codes_but_not_transport_errors():
+    mcc_client, http_client = make_client({
+        "9999": 404,
+        "1234": httpx.ConnectError("connection refused"),
+    })
+
+    assert await mcc_client.lookup("9999") == {"error": "HTTP error 404"}
+    assert await mcc_client.lookup("9999") == {"error": "HTTP error 404"}
+    assert "error" in await mcc_client.lookup("1234")
+    assert "error" in await mcc_client.lookup("1234")
+
+    assert http_client.calls.count("http://mcc/mcc/9999") == 1
+    assert http_client.calls.count("http://mcc/mcc/1234") == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_share_one_request():
+    mcc_client, http_client = make_client({"5411": {"code": 5411, "description": "Grocery"}}, delay=0.01)
+
+    results = await asyncio.gather(*(mcc_client.lookup("5411") for _ in range(10)))
+
+    assert all(result["code"] == 5411 for result in results)
+    assert len(http_client.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_lookup_does_not_cancel_the_other_waiters():
+    mcc_client, http_client = make_client({"5411": {"code": 5411, "description": "Grocery"}}, delay=0.05)
+
+    leader = asyncio.create_task(mcc_client.lookup("5411"))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(mcc_client.lookup("5411"))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert (await waiter)["code"] == 5411
+    assert leader.cancelled()
+    assert len(http_client.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_lookup_failure_reaches_every_waiter():
+    mcc_client, http_client = make_client({}, delay=0.01)
+
+    async def broken_fetch(key):
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    mcc_client._fetch = broken_fetch
+    results = await asyncio.gather(*(mcc_client.lookup("5411") for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert mcc_client._inflight == {}
+
+
+@pytest.mark.asyncio
+async def test_snapshot_answers_lookups_locally(tmp_path):
+    mcc_file = tmp_path / "mcc.json"
+    mcc_file.write_text('[{"code": 5812, "description": "Restaurants"}]', encoding="utf-8")
+    mcc_client, http_client = make_client({})
+
+    assert await mcc_client.refresh_snapshot(str(mcc_file))
+
+    assert await mcc_client.lookup("5812") == {"code": 5812, "description": "Restaurants"}
+    # Mesmas grafias aceitas pela mcc-api, que interpreta o código como inteiro
+    for spelling in ("05812", " 5812", 5812):
+        assert (await mcc_client.lookup(spelling))["code"] == 5812
+    assert "error" in await mcc_client.lookup("0000")
+    assert "error" in await mcc_client.lookup("abc")
+    assert http_client.calls == []
+
+
+@pytest.mark.asyncio
+async def test_snapshot_refresh_from_api_keeps_previous_on_failure():
+    mcc_client, http_client = make_client({"mcc": [{"code": 5411, "description": "Grocery"}]})
+
+    assert await mcc_client.refresh_snapshot()
+    assert http_client.calls == ["http://mcc/mcc"]
+
+    http_client.responses["mcc"] = httpx.ConnectError("mcc-api fora do ar")
+    assert not await mcc_client.refresh_snapshot()
+    assert mcc_client.snapshot_size == 1
+    assert (await mcc_client.lookup("5411"))["description"] == "Grocery"
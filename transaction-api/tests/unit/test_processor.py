@@ -129,11 +129,11 @@ async def test_process_and_create_transaction_with_mcc_request_success(fake_tran
 
     # Mocka call_mcc_api para retornar sucesso
     with patch('app.etl.processor.call_mcc_api', new=AsyncMock(return_value=fake_mcc_response)) as mock_call_mcc, \
-            patch('app.etl.processor.process_and_load_transaction',
-                  return_value="created_transaction") as mock_process_load:
+            patch('app.etl.processor.process_and_load_transaction_async',
+                  new=AsyncMock(return_value="created_transaction")) as mock_process_load:
         result = await processor.process_and_create_transaction_with_mcc_request(mock_db_session, fake_transaction_data)
         mock_call_mcc.assert_awaited_once_with(mcc=fake_transaction_data.mcc)
-        mock_process_load.assert_called_once_with(mock_db_session, fake_transaction_data)
+        mock_process_load.assert_awaited_once_with(mock_db_session, fake_transaction_data)
         assert result == "created_transaction"
 
 
@@ -145,3 +145,40 @@ async def test_process_and_create_transaction_with_mcc_request_mcc_error(fake_tr
             await processor.process_and_create_transaction_with_mcc_request(mock_db_session, fake_transaction_data)
         assert exc_info.value.status_code == 400
         assert "Erro ao buscar MCC" in exc_info.value.detail
+
+
+# --- Testa process_and_load_transaction_batch ---
+
+def test_process_and_load_transaction_batch_classifies_records(mock_db_session):
+    records = [
+        {"nome": "Existente", "mcc": "1234", "valor": 10.0},
+        {"nome": "Nova", "mcc": "1234", "valor": 20.0},
+        {"nome": "Nova", "mcc": "1234", "valor": 20.0},
+        {"nome": "Invalida", "mcc": "1234", "valor": 0},
+    ]
+    created_row = MagicMock(id=1, nome="Nova", mcc="1234", valor=20.0, data=datetime.datetime.now(), regiao=None)
+
+    with patch('app.etl.processor.get_existing_name_value_pairs', return_value={("Existente", 10.0)}) as mock_pairs, \
+            patch('app.etl.processor.create_db_transactions_bulk', return_value=[created_row]) as mock_bulk:
+        results = processor.process_and_load_transaction_batch(mock_db_session, records, start_index=100)
+
+    mock_pairs.assert_called_once()
+    mock_bulk.assert_called_once()
+    assert [t.nome for t in mock_bulk.call_args.args[1]] == ["Nova"]
+    assert [r.status for r in results] == ["conflict", "created", "conflict", "invalid"]
+    assert [r.index for r in results] == [100, 101, 102, 103]
+    assert results[1].transaction.id == 1
+    assert "valor" in results[3].detail
+
+
+def test_extract_batch_records_rejects_non_list():
+    with pytest.raises(HTTPException) as exc_info:
+        processor.extract_batch_records(b'{"nome": "x"}', "application/json")
+    assert exc_info.value.status_code == 400
+
+
+def test_extract_batch_records_keeps_undecodable_ndjson_line():
+    body = b'{"nome": "a", "mcc": "5812", "valor": 1.0}\n{"nome": "\xff"}\n'
+    records = processor.extract_batch_records(body, "application/x-ndjson")
+    assert records[0]["nome"] == "a"
+    assert isinstance(records[1], str)
@@ -0,0 +1,122 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.etl import processor
+from app.etl.regions_client import RegionsClient
+from app.schemas.transaction import TransactionCreate
+from tests.conftest import FakeHttpClient
+
+REGIONS = [{"id": 1, "code": "AL", "name": "Alabama"}, {"id": 5, "code": "CA", "name": "California"}]
+
+
+@pytest.fixture
+def regions_enabled(monkeypatch):
+    monkeypatch.setattr(settings, "REGIONS_ENRICHMENT_ENABLED", True)
+
+
+def make_client(outcome, now):
+    http_client = FakeHttpClient({"regions": outcome})
+    client = RegionsClient(http_client, "http://regions", max_age=100, retry_interval=10, clock=lambda: now[0])
+    return client, http_client
+
+
+@pytest.mark.asyncio
+async def test_lookup_loads_table_once_and_is_case_insensitive():
+    now = [0.0]
+    client, http_client = make_client(REGIONS, now)
+
+    results = await asyncio.gather(client.lookup("ca"), client.lookup("AL"), client.lookup("XX"))
+
+    assert results == [REGIONS[1], REGIONS[0], None]
+    assert len(http_client.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_table_is_refreshed_in_background_and_kept_on_failure():
+    now = [0.0]
+    client, http_client = make_client(REGIONS, now)
+    await client.lookup("CA")
+
+    now[0] = 150
+    http_client.responses["regions"] = httpx.ConnectError("regions-api fora do ar")
+    # Responde da cópia local enquanto a atualização falha em segundo plano
+    assert await client.lookup("CA") == REGIONS[1]
+    await asyncio.sleep(0.01)
+    assert len(http_client.calls) == 2
+    assert await client.lookup("CA") == REGIONS[1]
+    assert len(http_client.calls) == 2  # nova tentativa só após retry_interval
+
+
+def test_region_stage_normalizes_and_validates_region(monkeypatch, regions_enabled):
+    client, _ = make_client(REGIONS, [0.0])
+    client.load(REGIONS)
+    monkeypatch.setattr(processor, "regions_client", client)
+
+    transformed = processor.transform_region(TransactionCreate(nome="Loja", mcc="5812", valor=10, regiao=" ca"))
+    assert transformed.regiao == "CA"
+
+    with pytest.raises(processor.InvalidRegionError):
+        processor.transform_region(TransactionCreate(nome="Loja", mcc="5812", valor=10, regiao="ZZ"))
+    with pytest.raises(HTTPException) as exc_info:
+        processor.apply_region_stage(TransactionCreate(nome="Loja", mcc="5812", valor=10, regiao="ZZ"))
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_region_stage_fails_closed_when_table_is_unavailable(monkeypatch, regions_enabled):
+    client, _ = make_client(httpx.ConnectError("regions-api fora do ar"), [0.0])
+    monkeypatch.setattr(processor, "regions_client", client)
+
+    await processor.ensure_regions_loaded([{"regiao": "ca"}])
+    with pytest.raises(processor.RegionsUnavailableError):
+        processor.transform_region(TransactionCreate(nome="Loja", mcc="5812", valor=10, regiao="ca"))
+    with pytest.raises(HTTPException) as exc_info:
+        processor.apply_region_stage(TransactionCreate(nome="Loja", mcc="5812", valor=10, regiao="ca"))
+    assert exc_info.value.status_code == 503
+    # Sem região não há o que validar
+    transaction = TransactionCreate(nome="Loja", mcc="5812", valor=10)
+    assert processor.transform_region(transaction) is transaction
+
+
+def test_region_stage_is_skipped_when_disabled(monkeypatch):
+    client, http_client = make_client(REGIONS, [0.0])
+    monkeypatch.setattr(processor, "regions_client", client)
+
+    transformed = processor.transform_region(TransactionCreate(nome="Loja", mcc="5812", valor=10, regiao="zz"))
+    assert transformed.regiao == "zz"
+    assert http_client.calls == []
+
+
+@pytest.mark.asyncio
+async def test_regions_are_loaded_only_when_a_record_has_one(monkeypatch, regions_enabled):
+    client, http_client = make_client(REGIONS, [0.0])
+    monkeypatch.setattr(processor, "regions_client", client)
+
+    await processor.ensure_regions_loaded([{"nome": "Loja"}, TransactionCreate(nome="Loja", mcc="5812", valor=10)])
+    assert len(http_client.calls) == 0
+    await processor.ensure_regions_loaded([{"nome": "Loja"}, {"regiao": "CA"}])
+    assert len(http_client.calls) == 1 and client.loaded
+
+
+def test_every_load_path_goes_through_region_stage(client, db_session, monkeypatch, regions_enabled):
+    regions, _ = make_client(REGIONS, [0.0])
+    regions.load(REGIONS)
+    monkeypatch.setattr(processor, "regions_client", regions)
+
+    response = client.post("/transacoes/", json={"nome": "Loja", "mcc": "5812", "valor": 10.0, "regiao": "zz-not-a-region"})
+    assert response.status_code == 400
+    response = client.post("/transacoes/", json={"nome": "Loja", "mcc": "5812", "valor": 10.0, "regiao": "ca"})
+    assert response.json()["regiao"] == "CA"
+
+    response = client.post("/transacoes/batch", json=[
+        {"nome": "Loja", "mcc": "5812", "valor": 11.0, "regiao": "al"},
+        {"nome": "Loja", "mcc": "5812", "valor": 12.0, "regiao": "zz"},
+    ])
+    results = response.json()["results"]
+    assert results[0]["transaction"]["regiao"] == "AL"
+    assert results[1]["status"] == "invalid"
+    assert results[1]["detail"] == "Região inválida: zz"
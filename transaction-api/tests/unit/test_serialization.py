@@ -0,0 +1,47 @@
+import datetime
+import json
+
+from fastapi.encoders import jsonable_encoder
+
+from app.api import serialization
+from app.crud import transaction
+from app.schemas.transaction import TransactionCreate, TransactionResponse
+
+
+def _fastapi_body(objects):
+    """Corpo gerado pelo FastAPI com response_model=List[TransactionResponse]."""
+    return json.dumps(
+        jsonable_encoder([TransactionResponse.model_validate(obj) for obj in objects]),
+        ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def _seed(db_session):
+    for i, (valor, when) in enumerate([
+        (10.0, datetime.datetime(2024, 1, 1, 8, 0)),
+        (99.9, datetime.datetime(2024, 1, 1, 8, 0, 0, 123000)),
+        (0.01, datetime.datetime(2024, 1, 2, 23, 59, 59, 999999)),
+    ]):
+        transaction.create_db_transaction(
+            db_session, TransactionCreate(nome=f"Padaria São João {i}", mcc="5812", valor=valor, regiao="CA" if i else None), when
+        )
+
+
+def test_rows_are_serialized_like_the_response_model(db_session):
+    _seed(db_session)
+    objects = transaction.get_db_transactions(db_session)
+    rows = transaction.get_db_transactions(db_session, as_rows=True)
+
+    assert serialization.dumps_rows(rows) == _fastapi_body(objects)
+
+
+def test_stdlib_fallback_matches_orjson(db_session, monkeypatch):
+    _seed(db_session)
+    rows = transaction.get_db_transactions(db_session, as_rows=True)
+    fast = serialization.dumps_rows(rows)
+
+    monkeypatch.setattr(serialization, "orjson", None)
+    assert serialization.dumps_rows(rows) == fast
+    assert serialization.dumps_rows_ndjson(rows).splitlines()[0] == json.dumps(
+        json.loads(fast)[0], ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
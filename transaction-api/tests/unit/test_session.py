@@ -0,0 +1,56 @@
+import pytest
+from sqlalchemy import text
+
+from app.db.session import create_async_db_engine, create_db_engine, get_engine_kwargs
+
+
+def test_sqlite_engine_applies_performance_profile(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'perfil.db'}")
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert connection.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert connection.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        assert connection.execute(text("PRAGMA temp_store")).scalar() == 2  # MEMORY
+    assert engine.pool.size() == 5
+    engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_async_sqlite_engine_applies_performance_profile(tmp_path):
+    async_engine = create_async_db_engine(f"sqlite:///{tmp_path / 'perfil.db'}")
+    async with async_engine.connect() as connection:
+        assert (await connection.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+    await async_engine.dispose()
+
+
+def test_memory_sqlite_skips_pool_sizing():
+    # SQLite em memória usa uma única conexão e não aceita pool_size/max_overflow
+    assert "pool_size" not in get_engine_kwargs("sqlite://")
+    assert "pool_size" in get_engine_kwargs("postgresql://user@localhost/db")
+    assert get_engine_kwargs("postgresql://user@localhost/db")["connect_args"] == {"connect_timeout": 10}
+
+
+def test_engine_kwargs_follow_backend_and_settings(monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "DB_STATEMENT_TIMEOUT", 2000)
+    monkeypatch.setattr(settings, "DB_ECHO", True)
+
+    psycopg = get_engine_kwargs("postgresql://user@localhost/db")
+    assert psycopg["echo"] is True
+    assert psycopg["connect_args"]["options"] == "-c statement_timeout=2000"
+
+    asyncpg = get_engine_kwargs("postgresql+asyncpg://user@localhost/db")
+    assert asyncpg["connect_args"]["statement_cache_size"] == 500
+    assert asyncpg["connect_args"]["server_settings"] == {"statement_timeout": "2000"}
+
+
+def test_settings_are_read_from_the_environment(monkeypatch):
+    from app.core.config import Settings
+
+    monkeypatch.setenv("SQLALCHEMY_DATABASE_URL", "postgresql://user@db/transacoes")
+    monkeypatch.setenv("DB_POOL_SIZE", "20")
+
+    env_settings = Settings()
+    assert env_settings.SQLALCHEMY_DATABASE_URL == "postgresql://user@db/transacoes"
+    assert env_settings.DB_POOL_SIZE == 20
@@ -22,6 +22,36 @@ def test_create_and_get_transaction(db_session):
     assert found is not None
     assert found.id == created.id
 
+
+def test_create_transaction_uses_a_single_statement(db_session):
+    from sqlalchemy import event
+
+    statements = []
+    bind = db_session.get_bind()
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(bind, "before_cursor_execute", listener)
+    try:
+        created = transaction.create_db_transaction(
+            db_session, TransactionCreate(nome="Um comando", mcc="1234", valor=1.0), datetime.datetime.now()
+        )
+    finally:
+        event.remove(bind, "before_cursor_execute", listener)
+
+    # INSERT ... RETURNING e o upsert do resumo diário: nem SELECT de refresh, nem recarga após o commit
+    assert len(statements) == 2
+    assert statements[0].startswith("INSERT") and "RETURNING" in statements[0]
+    assert all(statement.startswith("INSERT") for statement in statements)
+    assert created.nome == "Um comando"
+
+@pytest.mark.asyncio
+async def test_create_and_get_transaction_async(async_db_session):
+    transaction_data = TransactionCreate(nome="Teste Async", mcc="1234", valor=150.0)
+    created = await transaction.create_db_transaction_async(async_db_session, transaction_data, datetime.datetime.now())
+    found = await transaction.get_transaction_by_name_and_value_async(async_db_session, "Teste Async", 150.0)
+
+    assert created.id is not None
+    assert found.id == created.id
+
 def test_get_db_transactions(db_session):
     # Insere várias transações
     for i in range(5):
@@ -53,3 +83,109 @@ def test_get_db_transactions_by_mcc(db_session):
     txs_2222 = transaction.get_db_transactions_by_mcc(db_session, "2222")
     assert len(txs_2222) == 1
     assert txs_2222[0].nome == "B"
+
+def test_create_db_transactions_bulk_and_existing_pairs(db_session):
+    batch = [TransactionCreate(nome=f"Lote{i}", mcc="3333", valor=10.0 + i) for i in range(3)]
+    processing_date = datetime.datetime.now()
+
+    rows = transaction.create_db_transactions_bulk(db_session, batch, processing_date)
+
+    assert sorted(row.nome for row in rows) == ["Lote0", "Lote1", "Lote2"]
+    assert all(row.id is not None and row.data == processing_date for row in rows)
+
+    existing = transaction.get_existing_name_value_pairs(
+        db_session, [("Lote0", 10.0), ("Lote1", 99.0), ("Outro", 12.0)]
+    )
+    assert existing == {("Lote0", 10.0)}
+
+def test_get_db_transactions_after_id(db_session):
+    created = [
+        transaction.create_db_transaction(db_session, TransactionCreate(nome=f"K{i}", mcc="1111", valor=1.0 + i),
+                                          datetime.datetime.now())
+        for i in range(4)
+    ]
+
+    page = transaction.get_db_transactions(db_session, limit=2, after_id=created[1].id)
+    assert [t.id for t in page] == [created[2].id, created[3].id]
+
+def test_stream_db_transactions_by_mcc(db_session):
+    for i in range(5):
+        transaction.create_db_transaction(db_session, TransactionCreate(nome=f"S{i}", mcc="7777", valor=1.0 + i),
+                                          datetime.datetime.now())
+
+    streamed = list(transaction.stream_db_transactions_by_mcc(db_session, "7777", batch_size=2))
+    assert [t.nome for t in streamed] == [f"S{i}" for i in range(5)]
+
+    limited = list(transaction.stream_db_transactions_by_mcc(db_session, "7777", limit=2, after_id=streamed[0].id))
+    assert [t.nome for t in limited] == ["S1", "S2"]
+
+
+def test_date_range_filters_and_query_plan(db_session):
+    from sqlalchemy import event
+
+    for i, day in enumerate([1, 2, 3]):
+        transaction.create_db_transaction(
+            db_session, TransactionCreate(nome=f"Loja {i}", mcc="5812", valor=10.0), datetime.datetime(2024, 1, day)
+        )
+
+    window = dict(date_from=datetime.datetime(2024, 1, 2), date_to=datetime.datetime(2024, 1, 3))
+    assert [t.nome for t in transaction.get_db_transactions(db_session, **window)] == ["Loja 1"]
+    assert [t.nome for t in transaction.get_db_transactions_by_mcc(db_session, "5812", **window)] == ["Loja 1"]
+    assert [t.nome for t in transaction.stream_db_transactions_by_mcc(db_session, "5812", **window)] == ["Loja 1"]
+
+    # As consultas que os endpoints executam (ordem, cursor e LIMIT incluídos) são buscas por
+    # intervalo nos índices de data e (mcc, data), sem varrer a tabela nem ordenar a janela
+    def plan(run):
+        executed = []
+        bind = db_session.get_bind()
+        listener = lambda conn, cursor, statement, parameters, *args: executed.append((statement, parameters))
+        event.listen(bind, "before_cursor_execute", listener)
+        try:
+            run()
+        finally:
+            event.remove(bind, "before_cursor_execute", listener)
+        [(statement, parameters)] = executed
+        rows = db_session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return " | ".join(row[3] for row in rows)
+
+    last_hour = dict(date_from=datetime.datetime(2024, 1, 2))
+    cursor = dict(after_id=1, after_data=datetime.datetime(2024, 1, 2))
+    cases = [
+        (lambda: transaction.get_db_transactions(db_session, limit=100, **last_hour), "ix_transactions_data (data>?)"),
+        (lambda: transaction.get_db_transactions(db_session, limit=100, **window), "ix_transactions_data (data>? AND data<?)"),
+        (lambda: transaction.get_db_transactions(db_session, limit=100, **last_hour, **cursor), "ix_transactions_data (data>?)"),
+        (lambda: transaction.get_db_transactions_by_mcc(db_session, "5812", limit=100, **last_hour),
+         "ix_transactions_mcc_data (mcc=? AND data>?)"),
+        (lambda: transaction.get_db_transactions_by_mcc(db_session, "5812", limit=100, **window, **cursor),
+         "ix_transactions_mcc_data (mcc=? AND data>? AND data<?)"),
+    ]
+    for run, index in cases:
+        query_plan = plan(run)
+        assert f"SEARCH transactions USING INDEX {index}" in query_plan
+        assert "SCAN" not in query_plan and "TEMP B-TREE" not in query_plan
+
+
+def test_date_window_is_paginated_by_data_and_id(db_session):
+    # Ids fora da ordem de data: a janela segue a data e o cursor (data, id) não pula nem repete linhas
+    days = [3, 1, 2, 2, 1]
+    created = [
+        transaction.create_db_transaction(
+            db_session, TransactionCreate(nome=f"Janela {i}", mcc="5812", valor=1.0 + i), datetime.datetime(2024, 2, day)
+        )
+        for i, day in enumerate(days)
+    ]
+    expected = [row.nome for row in sorted(created, key=lambda row: (row.data, row.id))]
+    window = dict(date_from=datetime.datetime(2024, 2, 1))
+
+    for fetch in (
+        lambda **kw: transaction.get_db_transactions(db_session, limit=2, **window, **kw),
+        lambda **kw: transaction.get_db_transactions_by_mcc(db_session, "5812", limit=2, **window, **kw),
+    ):
+        seen, page = [], fetch()
+        while page:
+            seen.extend(row.nome for row in page)
+            page = fetch(after_id=page[-1].id, after_data=page[-1].data)
+        assert seen == expected
+
+    with pytest.raises(ValueError):
+        transaction.get_db_transactions(db_session, after_id=1, **window)
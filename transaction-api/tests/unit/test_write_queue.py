@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.crud import transaction
+from app.etl import processor
+from app.etl.regions_client import RegionsClient
+from app.etl.write_queue import GroupCommitWriter
+from app.schemas.transaction import TransactionCreate
+
+
+@pytest.mark.asyncio
+async def test_concurrent_submits_are_committed_together(db_session, session_factory):
+    writer = GroupCommitWriter(session_factory, max_batch=10, max_delay=0.05)
+    flushes = []
+    load = writer._load
+    writer._load = lambda records: flushes.append(len(records)) or load(records)
+    writer.start()
+    try:
+        results = await asyncio.gather(
+            writer.submit(TransactionCreate(nome="Loja A", mcc="5812", valor=10.0)),
+            writer.submit(TransactionCreate(nome="Loja B", mcc="5812", valor=20.0)),
+            writer.submit(TransactionCreate(nome="Loja A", mcc="5812", valor=10.0)),
+            return_exceptions=True,
+        )
+    finally:
+        await writer.stop()
+
+    assert flushes == [3]
+    assert results[0].nome == "Loja A" and results[0].id is not None
+    assert results[1].nome == "Loja B"
+    # A duplicata recebe o mesmo 409 do caminho de uma transação por vez
+    assert isinstance(results[2], HTTPException) and results[2].status_code == 409
+    assert len(transaction.get_db_transactions(db_session)) == 2
+
+
+@pytest.mark.asyncio
+async def test_batch_is_flushed_when_full(session_factory):
+    writer = GroupCommitWriter(session_factory, max_batch=2, max_delay=60)
+    writer.start()
+    try:
+        results = await asyncio.wait_for(asyncio.gather(
+            writer.submit(TransactionCreate(nome="Loja C", mcc="5812", valor=1.0)),
+            writer.submit(TransactionCreate(nome="Loja D", mcc="5812", valor=2.0)),
+        ), timeout=5)
+    finally:
+        await writer.stop()
+
+    assert [result.nome for result in results] == ["Loja C", "Loja D"]
+
+
+@pytest.mark.asyncio
+async def test_submit_rejects_unknown_region_before_queueing(session_factory, monkeypatch):
+    regions = RegionsClient(None, "http://regions", max_age=100, retry_interval=10)
+    regions.load([{"id": 5, "code": "CA"}])
+    monkeypatch.setattr(processor, "regions_client", regions)
+    monkeypatch.setattr(settings, "REGIONS_ENRICHMENT_ENABLED", True)
+    writer = GroupCommitWriter(session_factory, max_batch=10, max_delay=0.01)
+    writer.start()
+    try:
+        with pytest.raises(HTTPException) as exc_info:
+            await writer.submit(TransactionCreate(nome="Loja E", mcc="5812", valor=1.0, regiao="zz"))
+        created = await writer.submit(TransactionCreate(nome="Loja E", mcc="5812", valor=1.0, regiao="ca"))
+    finally:
+        await writer.stop()
+
+    assert exc_info.value.status_code == 400
+    assert created.regiao == "CA"
+
+
+@pytest.mark.asyncio
+async def test_stop_waits_for_the_flush_in_progress(session_factory):
+    writer = GroupCommitWriter(session_factory, max_batch=1, max_delay=60)
+    flushing, release = asyncio.Event(), asyncio.Event()
+    loop = asyncio.get_running_loop()
+    flushes = []
+    load = writer._load
+
+    def slow_load(records):
+        flushes.append([record.nome for record in records])
+        if len(flushes) == 1:
+            loop.call_soon_threadsafe(flushing.set)
+            asyncio.run_coroutine_threadsafe(release.wait(), loop).result(timeout=5)
+        return load(records)
+
+    writer._load = slow_load
+    writer.start()
+    first = asyncio.create_task(writer.submit(TransactionCreate(nome="Loja F", mcc="5812", valor=1.0)))
+    await asyncio.wait_for(flushing.wait(), timeout=5)
+    second = asyncio.create_task(writer.submit(TransactionCreate(nome="Loja G", mcc="5812", valor=2.0)))
+    await asyncio.sleep(0)
+
+    stopping = asyncio.create_task(writer.stop())
+    await asyncio.sleep(0.05)
+    assert not stopping.done()  # the flush in progress is not abandoned
+    release.set()
+    await asyncio.wait_for(stopping, timeout=5)
+
+    assert flushes == [["Loja F"], ["Loja G"]]
+    assert (await first).nome == "Loja F"
+    assert (await second).nome == "Loja G"
+    assert not writer.running